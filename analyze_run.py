@@ -10,105 +10,147 @@ Generates:
 All outputs saved to backend/analytics_output/
 """
 
-import json
+import orjson
 import os
 from pathlib import Path
-import matplotlib.pyplot as plt
+import matplotlib
+matplotlib.use("Agg")
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 import numpy as np
+import pandas as pd
 
 OUTPUT_DIR = Path("analytics_output")
 OUTPUT_DIR.mkdir(exist_ok=True)
 
+# decision actions are stored as int codes; anything unknown counts as "conserve"
+ACTIONS = ["push", "normal", "conserve"]
+ACTION_CODES = {a: i for i, a in enumerate(ACTIONS)}
+
+# longer series are downsampled before plotting
+MAX_PLOT_POINTS = 2000
+
 # -----------------------------
 # Load replay file
 # -----------------------------
 def load_replay(path: str):
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    with open(path, "rb") as f:
+        return orjson.loads(f.read())
 
 # -----------------------------
 # Extract timeseries
 # -----------------------------
 def extract_timeseries(replay):
-    ticks = []
+    ticks = [entry["tick"] for entry in replay]
     lap_times = {}
     speeds = {}
     decisions = {}
-    events = []
-
-    for entry in replay:
-        tick = entry["tick"]
-        ticks.append(tick)
-
-        # per car values
-        for car in entry["cars"]:
-            cid = car["id"]
 
-            # lap time
-            lap_times.setdefault(cid, []).append(car["lap_time"])
+    # per car values: flatten every car record of every tick once, then split per car
+    cars = pd.json_normalize(replay, record_path="cars")
+    if not cars.empty:
+        for cid, g in cars.groupby("id", sort=False):
+            lap_times[cid] = g["lap_time"].to_numpy()
+            speeds[cid] = g["speed"].to_numpy()
 
-            # speed
-            speeds.setdefault(cid, []).append(car["speed"])
+    # decisions
+    rows = [(cid, ACTION_CODES.get(d["action"], 2)) for entry in replay for cid, d in entry["decisions"].items()]
+    if rows:
+        df = pd.DataFrame(rows, columns=["cid", "action"])
+        decisions = {cid: g.to_numpy() for cid, g in df.groupby("cid", sort=False)["action"]}
 
-        # decisions
-        for cid, d in entry["decisions"].items():
-            decisions.setdefault(cid, []).append(d["action"])
-
-        # events
-        if entry.get("events"):
-            events.append((tick, entry["events"]))
+    # events
+    events = [(entry["tick"], entry["events"]) for entry in replay if entry.get("events")]
 
     return ticks, lap_times, speeds, decisions, events
 
 # -----------------------------
 # Plot helper
 # -----------------------------
+# One headless figure is reused for every chart instead of going through pyplot
+_FIG = Figure()
+FigureCanvasAgg(_FIG)
+
+def new_figure(figsize):
+    _FIG.clear()
+    _FIG.set_size_inches(figsize)
+    return _FIG
+
 def save_plot(name, fig):
     out = OUTPUT_DIR / name
     fig.savefig(out, dpi=140, bbox_inches="tight")
-    plt.close(fig)
     print(f"[analytics] saved: {out}")
 
+def lttb(x, y, n_out=MAX_PLOT_POINTS):
+    """
+    Largest-Triangle-Three-Buckets downsampling: keep n_out points of (x, y)
+    that preserve the visual shape of the line. Shorter series are returned as-is.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if n <= n_out or n_out < 3:
+        return x, y
+
+    # first and last points are always kept; the rest is split into n_out-2 buckets
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    sizes = np.diff(edges)
+    avg_x = np.add.reduceat(x[:n - 1], edges[:-1]) / sizes
+    avg_y = np.add.reduceat(y[:n - 1], edges[:-1]) / sizes
+    # the third triangle vertex for bucket i is the mean of bucket i+1 (the last point for the final bucket)
+    next_x = np.append(avg_x[1:], x[-1])
+    next_y = np.append(avg_y[1:], y[-1])
+
+    keep = np.empty(n_out, dtype=int)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        area = np.abs((x[a] - next_x[i]) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (next_y[i] - y[a]))
+        a = lo + int(area.argmax())
+        keep[i + 1] = a
+    return x[keep], y[keep]
+
 # -----------------------------
 # Visualization
 # -----------------------------
 def plot_lap_times(ticks, lap_times):
-    fig = plt.figure(figsize=(10, 4))
+    fig = new_figure((10, 4))
+    ax = fig.add_subplot()
     for cid, series in lap_times.items():
-        plt.plot(ticks, series, label=cid)
-    plt.title("Lap Time Over Race")
-    plt.xlabel("Tick")
-    plt.ylabel("Lap Time")
-    plt.legend()
+        ax.plot(*lttb(ticks, series), label=cid)
+    ax.set_title("Lap Time Over Race")
+    ax.set_xlabel("Tick")
+    ax.set_ylabel("Lap Time")
+    ax.legend()
     save_plot("lap_times.png", fig)
 
 def plot_speeds(ticks, speeds):
-    fig = plt.figure(figsize=(10, 4))
+    fig = new_figure((10, 4))
+    ax = fig.add_subplot()
     for cid, series in speeds.items():
-        plt.plot(ticks, series, label=cid)
-    plt.title("Car Speed Over Time")
-    plt.xlabel("Tick")
-    plt.ylabel("Speed")
-    plt.legend()
+        ax.plot(*lttb(ticks, series), label=cid)
+    ax.set_title("Car Speed Over Time")
+    ax.set_xlabel("Tick")
+    ax.set_ylabel("Speed")
+    ax.legend()
     save_plot("speeds.png", fig)
 
 def plot_decisions(decisions):
-    fig = plt.figure(figsize=(8, 4))
-    labels = ["push", "normal", "conserve"]
-    counts = [0, 0, 0]
-
-    for cid, seq in decisions.items():
-        for a in seq:
-            if a == "push": counts[0] += 1
-            elif a == "normal": counts[1] += 1
-            else: counts[2] += 1
-
-    plt.bar(labels, counts)
-    plt.title("Decision Distribution Across Race")
+    fig = new_figure((8, 4))
+    ax = fig.add_subplot()
+    labels = ACTIONS
+    counts = np.zeros(len(labels), dtype=int)
+    if decisions:
+        counts = np.bincount(np.concatenate(list(decisions.values())), minlength=len(labels))
+
+    ax.bar(labels, counts)
+    ax.set_title("Decision Distribution Across Race")
     save_plot("decision_histogram.png", fig)
 
 def plot_event_timeline(events):
-    fig = plt.figure(figsize=(10, 3))
+    fig = new_figure((10, 3))
+    ax = fig.add_subplot()
     ys = []
     xs = []
 
@@ -116,10 +158,10 @@ def plot_event_timeline(events):
         xs.append(tick)
         ys.append(len(ev.get("new_events", [])))
 
-    plt.stem(xs, ys)
-    plt.title("Event Timeline (Crashes / Safety Car)")
-    plt.xlabel("Tick")
-    plt.ylabel("New Events")
+    ax.stem(xs, ys)
+    ax.set_title("Event Timeline (Crashes / Safety Car)")
+    ax.set_xlabel("Tick")
+    ax.set_ylabel("New Events")
     save_plot("event_timeline.png", fig)
 
 # -----------------------------
@@ -3,13 +3,18 @@
 import asyncio
 import json
 import logging
-from datetime import datetime
+import time
 
 import socketio
 
 logging.basicConfig(level=logging.INFO)
 sio = socketio.AsyncClient(logger=True, engineio_logger=True)
 
+# fixed table pieces, built once instead of per race_update
+RULE = "=" * 80
+DASHES = "-" * 80
+TABLE_HEADER = f"{'CAR':22} {'S':3} {'Lap':4} {'AI(est)s':10} {'inc':6} {'ΔD':6} {'R_AI':6} {'Action':10} {'Conf':5}"
+
 
 def fmt(x, d=2):
     try:
@@ -18,8 +23,15 @@ def fmt(x, d=2):
         return str(x)
 
 
+# last formatted second: (epoch second, "HH:MM:SS"); now() is called several times per message
+_now_cache = [0, ""]
+
+
 def now():
-    return datetime.now().strftime("%H:%M:%S")
+    t = int(time.time())
+    if t != _now_cache[0]:
+        _now_cache[:] = [t, time.strftime("%H:%M:%S", time.localtime(t))]
+    return _now_cache[1]
 
 
 @sio.event
@@ -39,7 +51,7 @@ async def race_started(data):
 @sio.event
 async def race_update(data):
     # Pretty print full payload first (non-ascii allowed)
-    print("\n" + "=" * 80)
+    print("\n" + RULE)
     print(f"[{now()}] 🔄 race_update (full payload):")
     try:
         print(json.dumps(data, indent=2, ensure_ascii=False))
@@ -56,8 +68,8 @@ async def race_update(data):
     header = f"[{now()}] Session={session} | Tick={tick} | rain={env.get('rain_intensity',0):.3f} temp={env.get('track_temp',0):.1f} | cars={len(cars)}"
     print(header)
     print("-" * len(header))
-    print(f"{'CAR':22} {'S':3} {'Lap':4} {'AI(est)s':10} {'inc':6} {'ΔD':6} {'R_AI':6} {'Action':10} {'Conf':5}")
-    print("-" * 80)
+    print(TABLE_HEADER)
+    print(DASHES)
     for c in cars:
         cid = c.get("car_id", "")[:22]
         series = c.get("series", "")[:3]
@@ -71,7 +83,7 @@ async def race_update(data):
         action = dec.get("action", "")
         conf = fmt(dec.get("confidence", 0.0), 2)
         print(f"{cid:22} {series:3} {str(lap):4} {ai_est:10} {inc:6} {str(delta_d):6} {r_ai:6} {action:10} {conf:5}")
-    print("=" * 80 + "\n")
+    print(RULE + "\n")
 
 
 @sio.event
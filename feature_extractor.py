@@ -1,55 +1,119 @@
 # feature_extractor.py
-from collections import deque, defaultdict
+import sys
 import numpy as np
+from numba import njit
 from typing import Dict
 
+# Order of the vector returned by DriverWindow.feature_vector; IntentPredictor.FEATURES is this tuple
+FEATURE_NAMES = ("speed_mean", "speed_std", "delta_speed", "throttle_mean",
+                 "brake_mean", "tyre_temp_mean", "lapprog_slope")
+
+
+@njit(cache=True, fastmath=True)
+def _push_row(buf, s1, s2, head, n, resync, speed, throttle, brake, tyre_temp, lap_progress):
+    # write one row at head and keep the running sums in step; n is the row count before the push
+    maxlen = buf.shape[0]
+    if n == maxlen:
+        # evict the oldest row from the running sums
+        for j in range(5):
+            old = np.float64(buf[head, j])
+            s1[j] -= old
+            s2[j] -= old * old
+    buf[head, 0] = speed
+    buf[head, 1] = throttle
+    buf[head, 2] = brake
+    buf[head, 3] = tyre_temp
+    buf[head, 4] = lap_progress
+    if resync:
+        # rebuild the sums from the buffer so add/subtract error can't accumulate
+        rows = min(n + 1, maxlen)
+        for j in range(5):
+            a = 0.0
+            b = 0.0
+            for i in range(rows):
+                v = np.float64(buf[i, j])
+                a += v
+                b += v * v
+            s1[j] = a
+            s2[j] = b
+    else:
+        for j in range(5):
+            v = np.float64(buf[head, j])
+            s1[j] += v
+            s2[j] += v * v
+
+
+@njit(cache=True, fastmath=True)
+def compute_features(buf, s1, s2, n, head):
+    # feature vector (FEATURE_NAMES order) of a non-empty window from its running sums;
+    # the sums stay float64 but the features are handed out as float32 like the buffer
+    maxlen = buf.shape[0]
+    last = (head - 1) % maxlen
+    # oldest row sits at head once the buffer has wrapped
+    first = head if n == maxlen else 0
+    out = np.empty(7, dtype=np.float32)
+    speed_mean = s1[0] / n
+    out[0] = speed_mean
+    out[1] = np.sqrt(max(s2[0] / n - speed_mean * speed_mean, 0.0))
+    out[2] = buf[last, 0] - speed_mean
+    out[3] = s1[1] / n
+    out[4] = s1[2] / n
+    out[5] = s1[3] / n
+    out[6] = (buf[last, 4] - buf[first, 4]) / max(n - 1, 1) if n >= 2 else 0.0
+    return out
+
+
 class DriverWindow:
     def __init__(self, maxlen=40):
         # Keep last N packets per driver (40 is a good default ~seconds depends on tick)
-        self.buf = deque(maxlen=maxlen)
+        # Ring buffer of rows: speed, throttle, brake, tyre_temp, lap_progress
+        self.maxlen = maxlen
+        self.buf = np.zeros((maxlen, 5), dtype=np.float32)
+        self.head = 0   # next row to write
+        self.n = 0      # number of valid rows
+        # running per-column sums of x and x^2 over the valid rows (float64 to limit drift)
+        self.s1 = np.zeros(5)
+        self.s2 = np.zeros(5)
+        self._pushes = 0
 
-    def push(self, pkt: dict):
-        self.buf.append(pkt)
+    def push(self, pkt):
+        # pkt is a TelemetryPacket (or anything with the same attributes); optional fields may be None
+        self._pushes += 1
+        _push_row(self.buf, self.s1, self.s2, self.head, self.n, self._pushes % self.maxlen == 0,
+                  getattr(pkt, 'speed_mps', 0.0) or 0.0, getattr(pkt, 'throttle_pct', 0.0) or 0.0,
+                  getattr(pkt, 'brake_pct', 0.0) or 0.0, getattr(pkt, 'tyre_temp', 0.0) or 0.0,
+                  getattr(pkt, 'lap_progress', 0.0) or 0.0)
+        self.head = (self.head + 1) % self.maxlen
+        self.n = min(self.n + 1, self.maxlen)
 
     def is_ready(self, min_samples=5):
-        return len(self.buf) >= min_samples
+        return self.n >= min_samples
+
+    def feature_vector(self) -> np.ndarray:
+        """Features as a float32 array in FEATURE_NAMES order (window must not be empty)."""
+        return compute_features(self.buf, self.s1, self.s2, self.n, self.head)
 
     def to_features(self) -> Dict:
-        arr = np.array([
-            [p.get('speed_mps',0.0), p.get('throttle_pct',0.0), p.get('brake_pct',0.0),
-             p.get('tyre_temp',0.0), p.get('lap_progress',0.0)]
-            for p in self.buf
-        ])
-        if arr.size == 0:
+        if self.n == 0:
             return {}
-        means = arr.mean(axis=0).tolist()
-        stds  = arr.std(axis=0).tolist()
-        delta_speed = float(arr[-1,0] - means[0])
-        lap_progress = arr[:,4]
-        if len(lap_progress) >= 2:
-            prog_slope = float((lap_progress[-1] - lap_progress[0]) / max(len(lap_progress)-1,1))
-        else:
-            prog_slope = 0.0
-        features = {
-            "speed_mean": float(means[0]),
-            "speed_std": float(stds[0]),
-            "delta_speed": delta_speed,
-            "throttle_mean": float(means[1]),
-            "brake_mean": float(means[2]),
-            "tyre_temp_mean": float(means[3]),
-            "lapprog_slope": prog_slope,
-            "samples": len(self.buf)
-        }
+        features = dict(zip(FEATURE_NAMES, self.feature_vector().tolist()))
+        features["samples"] = self.n
         return features
 
 class FeatureExtractor:
     def __init__(self):
-        self.windows: Dict[str, DriverWindow] = defaultdict(DriverWindow)
+        self.windows: Dict[str, DriverWindow] = {}
 
-    def push(self, telemetry: dict):
-        did = telemetry['driver_id']
-        self.windows[did].push(telemetry)
-        return self.windows[did]
+    def push(self, telemetry, min_samples=5):
+        """Add a packet to its driver's window and return the window's features ({} until min_samples)."""
+        # interned ids hash and compare by identity on every later lookup
+        did = sys.intern(telemetry.driver_id)
+        w = self.windows.get(did)
+        if w is None:
+            # a window (and its ring buffer) is allocated once per driver, on its first packet
+            w = self.windows[did] = DriverWindow()
+        w.push(telemetry)
+        return w.to_features() if w.is_ready(min_samples=min_samples) else {}
 
     def get_features(self, driver_id: str, min_samples=5):
         w = self.windows.get(driver_id)
@@ -1,5 +1,8 @@
 # intent_predictor.py
+from functools import lru_cache
 from typing import Dict, Tuple
+import numpy as np
+from feature_extractor import FEATURE_NAMES
 
 class IntentPredictor:
     """
@@ -9,6 +12,9 @@ class IntentPredictor:
     """
 
     INTENTS = ["push", "conserve", "prepare_pit", "bluff"]
+    INTENTS_ARR = np.array(INTENTS)
+    # column order of the feature matrix taken by predict_batch: the extractor's vector order
+    FEATURES = FEATURE_NAMES
 
     def __init__(self):
         pass
@@ -27,36 +33,77 @@ class IntentPredictor:
         lapprog_slope = features.get("lapprog_slope", 0.0)
         tyre_temp = features.get("tyre_temp_mean", 0.0)
 
-        scores = {i: 0.0 for i in self.INTENTS}
-
-        # push: high speed, positive delta_speed, decent throttle
-        if spd_mean > 35 and delta_speed > 0.5 and throttle > 40:
-            scores["push"] += 2.0
-        if spd_std > 3.0:
-            scores["push"] += 0.5
-
-        # prepare_pit: high tyre temp OR heavy braking + slowing lap progress
-        if tyre_temp > 80 and brake > 10:
-            scores["prepare_pit"] += 2.0
-        if brake > 20 and lapprog_slope < 0:
-            scores["prepare_pit"] += 1.0
-
-        # conserve: low speed, low throttle, low variance
-        if spd_mean < 25 and throttle < 30 and spd_std < 2.0:
-            scores["conserve"] += 2.0
-        if abs(lapprog_slope) < 0.001:
-            scores["conserve"] += 0.5
-
-        # bluff: high variance + odd delta speed with little braking
-        if spd_std > 6.0 and abs(delta_speed) > 3.0 and brake < 5:
-            scores["bluff"] += 1.5
-
-        # tiny smoothing to avoid zero-sum
-        for k in scores:
-            scores[k] += 0.01
-
-        total = sum(scores.values())
-        probs = {k: float(v/total) for k,v in scores.items()}
-        intent = max(probs, key=probs.get)
-        confidence = float(probs[intent])
-        return intent, probs, confidence
+        # Quantize each feature to the interval it falls in between the rule thresholds.
+        # This is lossless for the rules below, and the key space is small enough to cache.
+        intent, probs, confidence = _score(
+            (spd_mean >= 25) + (spd_mean > 35),
+            (spd_std >= 2.0) + (spd_std > 3.0) + (spd_std > 6.0),
+            (delta_speed >= -3.0) + (delta_speed > 0.5) + (delta_speed > 3.0),
+            (throttle >= 30) + (throttle > 40),
+            (brake >= 5) + (brake > 10) + (brake > 20),
+            (lapprog_slope > -0.001) + (lapprog_slope >= 0) + (lapprog_slope >= 0.001),
+            tyre_temp > 80,
+        )
+        return intent, dict(zip(self.INTENTS, probs)), confidence
+
+    def predict_batch(self, features_matrix: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Vectorized predict() over many drivers, e.g. every driver of one tick.
+        features_matrix: (N, 7) array with columns in FEATURES order.
+        Returns (labels (N,), probs (N, 4) with columns in INTENTS order, confidences (N,)).
+        """
+        # float32 throughout: plenty for threshold rules, and half the memory traffic
+        f = np.asarray(features_matrix, dtype=np.float32).reshape(-1, len(self.FEATURES))
+        spd_mean, spd_std, delta_speed, throttle, brake, tyre_temp, lapprog_slope = f.T
+        scores = np.zeros((len(f), len(self.INTENTS)), dtype=np.float32)
+        push, conserve, prepare_pit, bluff = scores.T  # column views
+
+        # same rules as predict(), one boolean mask per rule
+        push += 2.0 * ((spd_mean > 35) & (delta_speed > 0.5) & (throttle > 40))
+        push += 0.5 * (spd_std > 3.0)
+        prepare_pit += 2.0 * ((tyre_temp > 80) & (brake > 10))
+        prepare_pit += 1.0 * ((brake > 20) & (lapprog_slope < 0))
+        conserve += 2.0 * ((spd_mean < 25) & (throttle < 30) & (spd_std < 2.0))
+        conserve += 0.5 * (np.abs(lapprog_slope) < 0.001)
+        bluff += 1.5 * ((spd_std > 6.0) & (np.abs(delta_speed) > 3.0) & (brake < 5))
+        scores += 0.01
+
+        probs = scores / scores.sum(axis=1, keepdims=True)
+        idx = probs.argmax(axis=1)
+        return self.INTENTS_ARR[idx], probs, probs[np.arange(len(f)), idx]
+
+
+@lru_cache(maxsize=None)  # bounded: at most 3*4*4*3*4*4*2 distinct keys
+def _score(spd_q, std_q, delta_q, thr_q, brk_q, slope_q, hot_tyres) -> Tuple[str, Tuple[float, ...], float]:
+    """Score the quantized features (see IntentPredictor.predict). Returns (intent, probs, confidence)."""
+    push, conserve, prepare_pit, bluff = 0.0, 0.0, 0.0, 0.0
+
+    # push: high speed, positive delta_speed, decent throttle
+    if spd_q == 2 and delta_q >= 2 and thr_q == 2:
+        push += 2.0
+    if std_q >= 2:
+        push += 0.5
+
+    # prepare_pit: high tyre temp OR heavy braking + slowing lap progress
+    if hot_tyres and brk_q >= 2:
+        prepare_pit += 2.0
+    if brk_q == 3 and slope_q <= 1:
+        prepare_pit += 1.0
+
+    # conserve: low speed, low throttle, low variance
+    if spd_q == 0 and thr_q == 0 and std_q == 0:
+        conserve += 2.0
+    if slope_q in (1, 2):
+        conserve += 0.5
+
+    # bluff: high variance + odd delta speed with little braking
+    if std_q == 3 and delta_q in (0, 3) and brk_q == 0:
+        bluff += 1.5
+
+    # tiny smoothing to avoid zero-sum (same order as IntentPredictor.INTENTS)
+    scores = (push + 0.01, conserve + 0.01, prepare_pit + 0.01, bluff + 0.01)
+
+    total = sum(scores)
+    probs = tuple(float(v/total) for v in scores)
+    best = max(range(len(probs)), key=probs.__getitem__)
+    return IntentPredictor.INTENTS[best], probs, probs[best]
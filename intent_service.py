@@ -1,86 +1,146 @@
 # intent_service.py
 import asyncio
-import json
+import gzip
 import os
+import sys
+from collections import deque
 from datetime import datetime
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException
+import msgspec
+import orjson
+from fastapi import FastAPI, WebSocket, HTTPException, Request
+from fastapi.responses import ORJSONResponse, Response
 import uvicorn
 from telemetry_schema import TelemetryPacket
 from feature_extractor import FeatureExtractor
 from intent_predictor import IntentPredictor
 
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse)
 fe = FeatureExtractor()
 predictor = IntentPredictor()
+# validates and decodes a request body straight into a TelemetryPacket
+decode_packet = msgspec.json.Decoder(TelemetryPacket).decode
 
 # In-memory state
 leaderboard = {}      # driver_id -> latest simple summary
-clients = set()       # connected viewer websockets
+clients = {}          # connected viewer websocket -> (its bounded send queue, its sender task)
+CLIENT_QUEUE_SIZE = 16  # messages a viewer may fall behind before it is disconnected
 leaderboard_lock = asyncio.Lock()
-clients_lock = asyncio.Lock()
 
 # Replay folder and run tracking
 REPLAY_DIR = "replays"
+REPLAY_TAIL = 500     # most recent telemetry/intent records kept in memory for /replay/current
 os.makedirs(REPLAY_DIR, exist_ok=True)
 current_run_id = None
 current_replay = None
+replay_log = None     # append-only NDJSON file for the current run
 replay_lock = asyncio.Lock()
 
 def start_new_run(run_name=None):
-    global current_run_id, current_replay
+    global current_run_id, current_replay, replay_log
     ts = datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
     current_run_id = run_name or f"run_{ts}"
-    path = os.path.join(REPLAY_DIR, f"{current_run_id}.json")
+    if replay_log is not None:
+        replay_log.close()
+    # truncate: a repeated run id must not append to (and later consolidate) an earlier run's log
+    replay_log = open(os.path.join(REPLAY_DIR, f"{current_run_id}.ndjson"), "wb")
     current_replay = {
         "run_id": current_run_id,
         "started_at": ts,
-        "telemetry": [],
-        "intent_predictions": [],
+        "telemetry": deque(maxlen=REPLAY_TAIL),
+        "intent_predictions": deque(maxlen=REPLAY_TAIL),
         "events": []
     }
     return current_run_id
 
+def read_replay_log(path):
+    """Rebuild the full telemetry and intent lists of a run from its NDJSON log."""
+    telemetry, intent_predictions = [], []
+    with open(path, "rb") as f:
+        for line in f:
+            rec = orjson.loads(line)
+            telemetry.append(rec["telemetry"])
+            intent_predictions.append(rec["intent_prediction"])
+    return telemetry, intent_predictions
+
+def write_replay(path, replay, log_path):
+    """
+    Write the consolidated replay JSON of a run from its closed log, then drop the log
+    (blocking; run it in an executor).
+    """
+    telemetry, intent_predictions = read_replay_log(log_path)
+    replay = {**replay, "telemetry": telemetry, "intent_predictions": intent_predictions}
+    with open(path, "wb") as f:
+        f.write(orjson.dumps(replay, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
+    os.remove(log_path)
+
 # Start a default run automatically
 start_new_run()
 
+async def _sender(ws: WebSocket, q: asyncio.Queue):
+    # drain one viewer's queue; a failed send unregisters it so broadcasts stop queueing for it
+    try:
+        while True:
+            await ws.send_text(await q.get())
+    except Exception:
+        clients.pop(ws, None)
+
+_closing = set()      # background closes of dropped viewers (referenced until done)
+
+async def _close_ws(ws: WebSocket):
+    try:
+        await ws.close(code=1013)  # try again later
+    except Exception:
+        pass
+
+def _drop_client(ws: WebSocket):
+    # unregister and stop the sender now; the close handshake with a viewer this slow can take
+    # up to the close timeout, so it runs in the background instead of on the broadcast path
+    entry = clients.pop(ws, None)
+    if entry is None:
+        return
+    entry[1].cancel()
+    task = asyncio.create_task(_close_ws(ws))
+    _closing.add(task)
+    task.add_done_callback(_closing.discard)
+
 # broadcast to all connected websockets
 async def broadcast_json(message: dict):
-    async with clients_lock:
-        to_remove = []
-        for ws in list(clients):
-            try:
-                await ws.send_json(message)
-            except Exception:
-                to_remove.append(ws)
-        for r in to_remove:
-            clients.remove(r)
+    # encode once for every client instead of once per send
+    data = orjson.dumps(message).decode()
+    # only enqueue here: each client's sender task does the actual send, so a slow
+    # viewer backs up its own queue and is dropped on overflow instead of stalling ingest
+    dead = []
+    for ws, (q, _) in clients.items():
+        try:
+            q.put_nowait(data)
+        except asyncio.QueueFull:
+            dead.append(ws)
+    for ws in dead:
+        _drop_client(ws)
 
 @app.post("/telemetry")
-async def ingest_telemetry(payload: dict):
+async def ingest_telemetry(request: Request):
     # Validate incoming packet
     try:
-        pkt = TelemetryPacket(**payload).dict()
-    except Exception as e:
+        pkt = decode_packet(await request.body())
+    except msgspec.DecodeError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-    driver_id = pkt["driver_id"]
-    ts = pkt["timestamp_ms"]
+    driver_id = pkt.driver_id
+    ts = pkt.timestamp_ms
 
     # Update leaderboard snapshot
     async with leaderboard_lock:
         leaderboard[driver_id] = {
             "driver_id": driver_id,
             "ts_ms": ts,
-            "lap": pkt["lap"],
-            "lap_progress": pkt["lap_progress"],
-            "speed_mps": pkt["speed_mps"]
+            "lap": pkt.lap,
+            "lap_progress": pkt.lap_progress,
+            "speed_mps": pkt.speed_mps
         }
 
-    # Push into feature extractor
-    fe.push(pkt)
-
-    # Get features (if enough samples)
-    features = fe.get_features(driver_id, min_samples=5)
+    # Push into feature extractor and get features (if enough samples)
+    features = fe.push(pkt, min_samples=5)
 
     # Predict intent
     intent, probs, confidence = predictor.predict(features)
@@ -96,22 +156,24 @@ async def ingest_telemetry(payload: dict):
         "model_version": "intent-rules-v1"
     }
 
+    prediction = {
+        "ts_ms": ts,
+        "driver_id": driver_id,
+        "intent": intent,
+        "probabilities": probs,
+        "confidence": confidence,
+        "features": features
+    }
+    record = msgspec.structs.asdict(pkt)
+    line = orjson.dumps({"telemetry": record, "intent_prediction": prediction}) + b"\n"
+
     # Append telemetry and intent to replay
+    loop = asyncio.get_running_loop()
     async with replay_lock:
-        current_replay["telemetry"].append(pkt)
-        current_replay["intent_predictions"].append({
-            "ts_ms": ts,
-            "driver_id": driver_id,
-            "intent": intent,
-            "probabilities": probs,
-            "confidence": confidence,
-            "features": features
-        })
-        # occasional flush to disk
-        if len(current_replay["telemetry"]) % 200 == 0:
-            path = os.path.join(REPLAY_DIR, f"{current_run_id}.json")
-            with open(path, "w") as f:
-                json.dump(current_replay, f)
+        current_replay["telemetry"].append(record)
+        current_replay["intent_predictions"].append(prediction)
+        # one line per packet to the run log; the write runs off the event loop
+        await loop.run_in_executor(None, replay_log.write, line)
 
     # Broadcast leaderboard snapshot and intent
     lb_snapshot = {"type":"leaderboard", "ts_ms": ts, "data": list(leaderboard.values())}
@@ -123,37 +185,52 @@ async def ingest_telemetry(payload: dict):
 @app.websocket("/ws")
 async def ws_endpoint(ws: WebSocket):
     await ws.accept()
-    async with clients_lock:
-        clients.add(ws)
+    q = asyncio.Queue(CLIENT_QUEUE_SIZE)
+    # current leaderboard snapshot goes out first
+    async with leaderboard_lock:
+        q.put_nowait(orjson.dumps({"type":"leaderboard","ts_ms":0,"data":list(leaderboard.values())}).decode())
+    sender = asyncio.create_task(_sender(ws, q))
+    clients[ws] = (q, sender)
     try:
-        # send current leaderboard snapshot once
-        async with leaderboard_lock:
-            await ws.send_json({"type":"leaderboard","ts_ms":0,"data":list(leaderboard.values())})
         while True:
             # keep connection alive; optionally accept viewer messages
             await ws.receive_text()
-    except WebSocketDisconnect:
-        async with clients_lock:
-            if ws in clients:
-                clients.remove(ws)
     except Exception:
-        async with clients_lock:
-            if ws in clients:
-                clients.remove(ws)
+        # WebSocketDisconnect, or the socket was closed under us by _drop_client
+        pass
+    finally:
+        clients.pop(ws, None)
+        sender.cancel()
 
 @app.get("/replay/current")
-async def get_current_replay():
+async def get_current_replay(request: Request):
     async with replay_lock:
-        return current_replay
+        body = orjson.dumps(current_replay, default=list, option=orjson.OPT_SERIALIZE_NUMPY)
+    # replay JSON is very repetitive, gzip typically shrinks it several times over
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        return Response(gzip.compress(body, compresslevel=6), media_type="application/json",
+                        headers={"Content-Encoding": "gzip", "Vary": "Accept-Encoding"})
+    return Response(body, media_type="application/json", headers={"Vary": "Accept-Encoding"})
 
 @app.post("/replay/save")
 async def save_replay_and_start_new(name: str = None):
     async with replay_lock:
+        # under the lock only swap runs: close the log and move it aside, so a new run that
+        # reuses this run id starts its own log instead of truncating the one being saved
         path = os.path.join(REPLAY_DIR, f"{current_run_id}.json")
-        with open(path, "w") as f:
-            json.dump(current_replay, f, indent=2)
+        replay = current_replay
+        replay_log.close()
+        log_path = replay_log.name + ".saving"
+        os.replace(replay_log.name, log_path)
         start_new_run(run_name=name)
+    # reading the log and writing the JSON scale with run length: off the event loop, and
+    # outside the lock so telemetry ingest for the new run carries on meanwhile
+    await asyncio.get_running_loop().run_in_executor(None, write_replay, path, replay, log_path)
     return {"ok": True}
 
 if __name__ == "__main__":
-    uvicorn.run("intent_service:app", host="0.0.0.0", port=8000)
+    # permessage-deflate compresses the leaderboard/intent broadcasts on the wire;
+    # uvloop has no Windows build, so fall back to asyncio's loop there
+    uvicorn.run("intent_service:app", host="0.0.0.0", port=8000, ws_per_message_deflate=True,
+                loop="asyncio" if sys.platform == "win32" else "uvloop",
+                http="httptools", ws="websockets")
@@ -1,25 +1,66 @@
 # main.py
 import asyncio
-import json
+import logging
 import os
+import queue
+import re
+import sys
 import time
+from collections import ChainMap, deque
+from contextlib import asynccontextmanager
+from functools import lru_cache
 from datetime import datetime, timezone
-from typing import Dict, Any, List, Optional
+from itertools import islice
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Any, List, Optional, Tuple
 
+import orjson
 import socketio
+from sortedcontainers import SortedList
 from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse, Response
 from starlette.middleware.cors import CORSMiddleware
 
 # ----------------------------- CONFIG -----------------------------
 EMIT_INTERVAL_S = 0.5  # minimum time between leaderboard emits
 MAX_LEADERBOARD = 20    # number of top drivers to keep/emit
+# driver fields carried by each leaderboard entry (full state stays on /drivers/{id} and driver:batch)
+LEADERBOARD_KEYS = ("driver_id", "position", "completed_laps", "total_time", "best_lap", "last_update_ts")
 REPLAYS_DIR = "replays"
+REPLAY_TAIL = 500       # most recent telemetry records of the current run kept in memory
+REPLAY_FSYNC_S = 5.0    # how often the replay writer fsyncs its NDJSON log
+REPLAY_QUEUE_MAX = 10000  # encoded records waiting for the replay writer; beyond this they are dropped
 os.makedirs(REPLAYS_DIR, exist_ok=True)
 
 # ----------------------------- SERVER SETUP -----------------------------
-sio = socketio.AsyncServer(async_mode="asgi", cors_allowed_origins="*")
-app = FastAPI(title="Race Sim Backend - Leaderboard & Sim Control")
+# MessagePack frames are smaller and cheaper to encode than JSON; browser clients need
+# socket.io-msgpack-parser (io(url, {parser: msgpackParser})) to talk to this server
+sio = socketio.AsyncServer(async_mode="asgi", cors_allowed_origins="*", serializer="msgpack")
+
+# Handlers only enqueue records; formatting and the stderr write happen on the listener's thread
+logger = logging.getLogger("racesim")
+logger.setLevel(logging.INFO)
+logger.propagate = False
+_log_queue: queue.SimpleQueue = queue.SimpleQueue()
+_log_handler = QueueHandler(_log_queue)
+_log_listener = QueueListener(_log_queue, logging.StreamHandler())
+
+
+# The handler is attached only while this app's listener runs. `python main.py` also imports the
+# module as `main` for uvicorn; the __main__ copy never starts, so it must not feed a queue nobody drains.
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    _log_listener.start()
+    logger.addHandler(_log_handler)
+    try:
+        yield
+    finally:
+        logger.removeHandler(_log_handler)
+        _log_listener.stop()
+
+
+app = FastAPI(title="Race Sim Backend - Leaderboard & Sim Control", default_response_class=ORJSONResponse,
+              lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -34,115 +75,284 @@ app.mount("/socket.io", socket_app)
 
 # ----------------------------- LEADERBOARD STATE -----------------------------
 driver_states: Dict[str, Dict[str, Any]] = {}
-leaderboard_lock = asyncio.Lock()
-last_emit_ts: float = 0.0
+# No lock around this state: it is only touched from the event loop, and no update or read
+# of it spans an await, so the cooperative scheduler already keeps each one atomic.
+# drivers kept in leaderboard order as (sort_key, driver_id); _sort_keys holds each driver's current entry key
+_ranked = SortedList()
+_sort_keys: Dict[str, tuple] = {}
+last_emit_ts: float = float("-inf")  # time.monotonic() of the last leaderboard emit
 _emit_task: Optional[asyncio.Task] = None
+# last computed leaderboard: (computed_at, encoded {"leaderboard": ...} JSON, leaderboard list)
+_lb_cache: Optional[Tuple[float, bytes, List[Dict[str, Any]]]] = None
+# drivers updated since the last emit; their states go out once per emit as driver:batch
+_dirty: set = set()
+ALL_DRIVERS_ROOM = "drv:*"  # receives every driver's state in one driver:batch frame
+# driver rooms each connected telemetry sender has already joined (dropped on disconnect)
+_sid_drivers: Dict[str, set] = {}
+
+
+def driver_room(driver_id: str) -> str:
+    return f"drv:{driver_id}"
 
 # ----------------------------- SIM RUN STATE -----------------------------
 _current_run_id: Optional[str] = None
 _current_replay: Optional[Dict[str, Any]] = None
+# encoded NDJSON lines queued for the current run's log, drained by _replay_writer (None ends a run)
+_replay_q: Optional[asyncio.Queue] = None
+_replay_dropped = 0  # lines dropped because _replay_q was full
+_replay_tasks: set = set()  # running writers (a finished run's writer lingers until it drains)
 
 # ----------------------------- UTILITIES -----------------------------
 
 
+def _jdump(path: str, obj: Any) -> None:
+    """Write obj to path as indented JSON (orjson, bytes straight to the file)."""
+    with open(path, "wb") as f:
+        f.write(orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+
+
+# run ids as _mk_run_id makes them; anything else (e.g. "../x") never reaches the filesystem
+_RUN_ID_RE = re.compile(r"[\w\-]{1,64}")
+
+
+@lru_cache(maxsize=256)  # saved configs never change once their run has started
+def _load_config_bytes(run_id: str) -> bytes:
+    with open(os.path.join(REPLAYS_DIR, f"{run_id}_config.json"), "rb") as f:
+        return f.read()
+
+
+# constant bodies, encoded once at import
+EMPTY_LEADERBOARD = {"leaderboard": []}
+_EMPTY_LB_JSON = orjson.dumps(EMPTY_LEADERBOARD)
+_OK_JSON = orjson.dumps({"ok": True})
+
+
+def _json(obj: Any, status: int = 200) -> Response:
+    """orjson-encoded JSON response that bypasses FastAPI's jsonable_encoder."""
+    return Response(orjson.dumps(obj), status_code=status, media_type="application/json")
+
+
+def _persist(cfg_path: str, cfg: Dict[str, Any], replay_path: str, replay: Dict[str, Any]) -> None:
+    """Write a new run's config and replay skeleton (blocking; run it in an executor)."""
+    _jdump(cfg_path, cfg)
+    _jdump(replay_path, replay)
+
+
+# the only driver fields sort_key reads; updates touching none of them keep their rank
+RANK_FIELDS = frozenset(("completed_laps", "position", "total_time", "best_lap"))
+
+
+def sort_key(d: Dict[str, Any]) -> tuple:
+    return (
+        -int(d.get("completed_laps", 0)),
+        int(d.get("position", 9999)),
+        float(d.get("total_time", float("inf"))),
+        float(d.get("best_lap", float("inf"))),
+    )
+
+
+def _rerank(driver_id: str, sk: tuple) -> None:
+    """Move driver_id to its place for sort key sk in _ranked (O(log N))."""
+    old = _sort_keys.get(driver_id)
+    if old is not None:
+        _ranked.discard((old, driver_id))
+    _sort_keys[driver_id] = sk
+    _ranked.add((sk, driver_id))
+
+
+def _clear_drivers() -> None:
+    """Forget every driver."""
+    global _lb_cache
+    # the empty board is known up front; readers get it without a recompute
+    _lb_cache = (time.monotonic(), _EMPTY_LB_JSON, [])
+    driver_states.clear()
+    _dirty.clear()
+    _ranked.clear()
+    _sort_keys.clear()
+
+
+def _write_fsync(f, data: bytes, sync: bool) -> None:
+    f.write(data)
+    if sync:
+        f.flush()
+        os.fsync(f.fileno())
+
+
+async def _replay_writer(run_id: str, q: asyncio.Queue) -> None:
+    """Append queued NDJSON lines to replays/<run_id>.ndjson until a None arrives."""
+    loop = asyncio.get_running_loop()
+    path = os.path.join(REPLAYS_DIR, f"{run_id}.ndjson")
+    f = await loop.run_in_executor(None, open, path, "ab")
+    last_sync = time.monotonic()
+    try:
+        done = False
+        while not done:
+            # take everything queued since the last write and write it in one go
+            recs = [await q.get()]
+            while not q.empty():
+                recs.append(q.get_nowait())
+            if recs[-1] is None:
+                recs.pop()
+                done = True
+            data = b"".join(recs)
+            sync = done or time.monotonic() - last_sync >= REPLAY_FSYNC_S
+            await loop.run_in_executor(None, _write_fsync, f, data, sync)
+            if sync:
+                last_sync = time.monotonic()
+    finally:
+        await loop.run_in_executor(None, f.close)
+
+
 async def recompute_leaderboard() -> List[Dict[str, Any]]:
     """Return sorted leaderboard list (top MAX_LEADERBOARD)."""
-    async with leaderboard_lock:
-        drivers = list(driver_states.values())
+    # _ranked is kept sorted on every update, so this only walks the top entries
+    top = [driver_states[did] for _, did in islice(_ranked, MAX_LEADERBOARD)]
 
-    def sort_key(d: Dict[str, Any]):
-        return (
-            -int(d.get("completed_laps", 0)),
-            int(d.get("position", 9999)),
-            float(d.get("total_time", float("inf"))),
-            float(d.get("best_lap", float("inf"))),
-        )
+    # small fixed-shape entries rather than copies of whole telemetry-laden driver dicts
+    return [{"rank": idx, **{k: d.get(k) for k in LEADERBOARD_KEYS}}
+            for idx, d in enumerate(top, start=1)]
 
-    drivers.sort(key=sort_key)
-    top = drivers[:MAX_LEADERBOARD]
 
-    leaderboard = []
-    for idx, d in enumerate(top, start=1):
-        item = d.copy()
-        item["rank"] = idx
-        leaderboard.append(item)
+async def refresh_leaderboard_cache() -> Tuple[bytes, List[Dict[str, Any]]]:
+    """Recompute the leaderboard, encode it once and remember both in _lb_cache."""
+    global _lb_cache
+    lb = await recompute_leaderboard()
+    blob = orjson.dumps({"leaderboard": lb})
+    _lb_cache = (time.monotonic(), blob, lb)
+    return blob, lb
+
 
-    return leaderboard
+async def cached_leaderboard() -> Tuple[bytes, List[Dict[str, Any]]]:
+    """
+    Leaderboard as (encoded JSON, list), reused if computed less than EMIT_INTERVAL_S ago.
+    Staleness is bounded the same way the debounced emits already bound it.
+    """
+    cache = _lb_cache
+    if cache is not None and time.monotonic() - cache[0] < EMIT_INTERVAL_S:
+        return cache[1], cache[2]
+    return await refresh_leaderboard_cache()
 
 
 async def schedule_emit_leaderboard():
     """Schedule a debounced leaderboard emit after EMIT_INTERVAL_S has passed."""
     global last_emit_ts, _emit_task
 
-    now = time.time()
-    elapsed = now - last_emit_ts
-    remaining = max(0.0, EMIT_INTERVAL_S - elapsed)
-
+    # common case on a busy feed: an emit is already pending and will pick this update up
     if _emit_task is not None and not _emit_task.done():
         return
 
+    # monotonic: debounce math must not jump with wall-clock adjustments
+    remaining = max(0.0, EMIT_INTERVAL_S - (time.monotonic() - last_emit_ts))
+
     async def _delayed_emit(wait: float):
         global last_emit_ts, _emit_task
         try:
             if wait > 0:
                 await asyncio.sleep(wait)
-            leaderboard = await recompute_leaderboard()
+            # always fresh here; subscribers and GET /leaderboard reuse it until the next emit
+            _, leaderboard = await refresh_leaderboard_cache()
             await sio.emit("leaderboard:update", {"leaderboard": leaderboard})
-            last_emit_ts = time.time()
+            await emit_driver_batch()
+            last_emit_ts = time.monotonic()
         finally:
             _emit_task = None
 
     _emit_task = asyncio.create_task(_delayed_emit(remaining))
 
 
+async def emit_driver_batch():
+    """Send the states of drivers updated since the last call: {id: state} per driver room, all of them to drv:*."""
+    # copies, so the frames hold the state as of this emit
+    batch = {did: driver_states[did].copy() for did in _dirty if did in driver_states}
+    _dirty.clear()
+    if not batch:
+        return
+    await sio.emit("driver:batch", batch, room=ALL_DRIVERS_ROOM)
+    for did, state in batch.items():
+        await sio.emit("driver:batch", {did: state}, room=driver_room(did))
+
+
 async def process_telemetry_update(payload: Dict[str, Any], sid: Optional[str] = None):
     """
     Shared logic to handle telemetry payloads from Socket.IO or HTTP POST.
     Expects payload to contain at least 'driver_id'. Updates driver_states and schedules emit.
     """
+    global _replay_dropped
+
     if not payload or "driver_id" not in payload:
         raise ValueError("missing driver_id in telemetry payload")
 
     driver_id = str(payload["driver_id"])
+    now = time.time()  # one clock read per update, shared by the state and the replay record
 
-    async with leaderboard_lock:
-        existing = driver_states.get(driver_id, {})
-        updated = existing.copy()
-        updated.update(payload)
-        updated["last_update_ts"] = time.time()
-        driver_states[driver_id] = updated
+    # rank the merged state before merging it, so a rank field that won't convert
+    # (None, "abc", ...) is refused with the driver's state and rank untouched
+    d = driver_states.get(driver_id)
+    sk = None
+    if d is None or not RANK_FIELDS.isdisjoint(payload):
+        try:
+            sk = sort_key(payload if d is None else ChainMap(payload, d))
+        except (TypeError, ValueError, OverflowError):
+            raise ValueError("position, completed_laps, total_time and best_lap must be numbers")
 
-    # also append to current replay if present (non-blocking)
+    # encode the replay record up front: a payload orjson rejects (e.g. an int beyond 64 bits)
+    # is refused here, before it touches any state, rather than reaching the writer
+    rec = line = None
     if _current_replay is not None:
+        rec = {
+            "ts": int(now * 1000),
+            "driver_id": driver_id,
+            "payload": payload
+        }
         try:
-            # Keep small memory footprint: don't lock replay file for long
-            _current_replay.setdefault("telemetry", []).append({
-                "ts": int(time.time() * 1000),
-                "driver_id": driver_id,
-                "payload": payload
-            })
-        except Exception:
-            # never break telemetry flow for replay errors
-            pass
+            line = orjson.dumps(rec) + b"\n"
+        except orjson.JSONEncodeError as e:
+            raise ValueError(f"telemetry payload not JSON-encodable: {e}")
+
+    # merge in place; a driver's dict is created once, on its first update
+    if d is None:
+        d = driver_states[driver_id] = {}
+    d.update(payload)
+    d["last_update_ts"] = now
+    _dirty.add(driver_id)
+    if sk is not None:
+        _rerank(driver_id, sk)
 
+    # also append to current replay if present (non-blocking)
+    if rec is not None:
+        # bounded in-memory tail; the full history goes to disk via _replay_writer
+        _current_replay["telemetry"].append(rec)
+        try:
+            _replay_q.put_nowait(line)
+        except asyncio.QueueFull:
+            # never stall telemetry on a slow disk; the record is lost from the log only
+            _replay_dropped += 1
+            if _replay_dropped % 1000 == 1:
+                logger.warning("replay queue full, %d records dropped so far", _replay_dropped)
+
+    # the driver's new state goes out with the next debounced emit (see emit_driver_batch);
+    # a Socket.IO sender joins its driver's room so it keeps receiving it
+    if sid is not None:
+        joined = _sid_drivers.setdefault(sid, set())
+        if driver_id not in joined:
+            joined.add(driver_id)
+            await sio.enter_room(sid, driver_room(driver_id))
     await schedule_emit_leaderboard()
 
-    # emit driver-specific update (to the sender room if provided)
-    await sio.emit("driver:update", {"driver_id": driver_id, "state": driver_states[driver_id]}, room=sid)
-
 
 # ----------------------------- SOCKET.IO EVENTS -----------------------------
 
 
 @sio.event
 async def connect(sid, environ, auth):
-    print(f"[socket.io] Client connected: {sid}")
+    logger.info("[socket.io] Client connected: %s", sid)
     await sio.emit("server:hello", {"msg": "welcome", "sid": sid}, room=sid)
 
 
 @sio.event
 async def disconnect(sid):
-    print(f"[socket.io] Client disconnected: {sid}")
+    logger.info("[socket.io] Client disconnected: %s", sid)
+    _sid_drivers.pop(sid, None)
 
 
 @sio.on("telemetry:update")
@@ -155,15 +365,21 @@ async def handle_telemetry_update(sid, data):
 
 @sio.on("leaderboard:subscribe")
 async def handle_leaderboard_subscribe(sid, data):
-    leaderboard = await recompute_leaderboard()
+    # optional {"drivers": [ids]} (or "*" for all) also subscribes to those drivers' driver:batch
+    drivers = data.get("drivers") if isinstance(data, dict) else None
+    if drivers == "*":
+        await sio.enter_room(sid, ALL_DRIVERS_ROOM)
+    elif isinstance(drivers, list):
+        for did in drivers:
+            await sio.enter_room(sid, driver_room(str(did)))
+    _, leaderboard = await cached_leaderboard()
     await sio.emit("leaderboard:update", {"leaderboard": leaderboard}, room=sid)
 
 
 @sio.on("leaderboard:reset")
 async def handle_leaderboard_reset(sid, data):
-    async with leaderboard_lock:
-        driver_states.clear()
-    await sio.emit("leaderboard:update", {"leaderboard": []})
+    _clear_drivers()
+    await sio.emit("leaderboard:update", EMPTY_LEADERBOARD)
 
 
 # ----------------------------- FASTAPI ENDPOINTS -----------------------------
@@ -171,22 +387,21 @@ async def handle_leaderboard_reset(sid, data):
 
 @app.get("/leaderboard")
 async def get_leaderboard():
-    lb = await recompute_leaderboard()
-    return JSONResponse({"leaderboard": lb})
+    # already-encoded bytes: no jsonable_encoder or re-serialization while the cache is fresh
+    blob, _ = await cached_leaderboard()
+    return Response(blob, media_type="application/json")
 
 
 @app.post("/leaderboard/reset")
 async def http_reset_leaderboard():
-    async with leaderboard_lock:
-        driver_states.clear()
-    await sio.emit("leaderboard:update", {"leaderboard": []})
-    return JSONResponse({"ok": True})
+    _clear_drivers()
+    await sio.emit("leaderboard:update", EMPTY_LEADERBOARD)
+    return Response(_OK_JSON, media_type="application/json")
 
 
 @app.get("/drivers/{driver_id}")
 async def get_driver(driver_id: str):
-    async with leaderboard_lock:
-        d = driver_states.get(driver_id)
+    d = driver_states.get(driver_id)
     if not d:
         raise HTTPException(status_code=404, detail="driver not found")
     return d
@@ -208,16 +423,28 @@ async def http_telemetry(request: Request):
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-    return JSONResponse({"ok": True})
+    return Response(_OK_JSON, media_type="application/json")
 
 
 # ----------------------------- SIM CONTROL ENDPOINTS -----------------------------
 
 
-def _mk_run_id(name: Optional[str] = None) -> str:
-    ts = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+class _RunIdChars(dict):
+    """str.translate table: alphanumerics, '-' and '_' kept, anything else becomes '_'. Filled on first sight of each char."""
+
+    def __missing__(self, code: int):
+        c = chr(code)
+        out = self[code] = code if c.isalnum() or c in "-_" else "_"
+        return out
+
+
+_RUN_ID_CHARS = _RunIdChars()
+
+
+def _mk_run_id(name: Optional[str] = None, now: Optional[datetime] = None) -> str:
+    ts = now.strftime("%Y%m%dT%H%M%SZ") if now else time.strftime("%Y%m%dT%H%M%SZ", time.gmtime())
     if name:
-        safe = "".join(c if c.isalnum() or c in "-_" else "_" for c in name)[:40]
+        safe = name[:40].translate(_RUN_ID_CHARS)
         return f"{safe}_{ts}"
     return f"run_{ts}"
 
@@ -226,9 +453,10 @@ def _mk_run_id(name: Optional[str] = None) -> str:
 async def start_simulation(request: Request):
     """
     Start a new simulation run. Accepts arbitrary JSON config ({} is fine).
-    Saves <run_id>_config.json and creates a <run_id>.json replay skeleton.
+    Saves <run_id>_config.json and creates a <run_id>.json replay skeleton;
+    the run's telemetry is then appended to <run_id>.ndjson.
     """
-    global _current_run_id, _current_replay
+    global _current_run_id, _current_replay, _replay_q
 
     try:
         cfg = await request.json()
@@ -236,37 +464,48 @@ async def start_simulation(request: Request):
         cfg = {}
 
     run_name = cfg.get("run_name")
-    run_id = _mk_run_id(run_name)
-    cfg["_meta"] = {"created_at": datetime.now(timezone.utc).isoformat(), "run_id": run_id}
-
-    cfg_path = os.path.join(REPLAYS_DIR, f"{run_id}_config.json")
-    with open(cfg_path, "w", encoding="utf-8") as f:
-        json.dump(cfg, f, indent=2)
+    now = datetime.now(timezone.utc)
+    started_at = now.isoformat()
+    run_id = _mk_run_id(run_name, now)
+    cfg["_meta"] = {"created_at": started_at, "run_id": run_id}
 
     replay = {
         "run_id": run_id,
         "config": cfg,
-        "started_at": datetime.now(timezone.utc).isoformat(),
+        "started_at": started_at,
         "telemetry": [],
         "intent_predictions": [],
         "events": []
     }
+    cfg_path = os.path.join(REPLAYS_DIR, f"{run_id}_config.json")
     replay_path = os.path.join(REPLAYS_DIR, f"{run_id}.json")
-    with open(replay_path, "w", encoding="utf-8") as f:
-        json.dump(replay, f, indent=2)
+    # both writes in one executor hop so the event loop keeps serving telemetry meanwhile
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(None, _persist, cfg_path, cfg, replay_path, replay)
+    replay["telemetry"] = deque(maxlen=REPLAY_TAIL)
+
+    # start this run's writer, then let the previous one drain and close; its queue gets
+    # nothing new once swapped out, so the end marker only waits for the writer to make room
+    prev_q = _replay_q
+    _replay_q = asyncio.Queue(maxsize=REPLAY_QUEUE_MAX)
+    task = asyncio.create_task(_replay_writer(run_id, _replay_q))
+    _replay_tasks.add(task)
+    task.add_done_callback(_replay_tasks.discard)
 
     _current_run_id = run_id
     _current_replay = replay
+    if prev_q is not None:
+        await prev_q.put(None)
 
     # announce to any connected clients that a new run started
     await sio.emit("sim:start", {"run_id": run_id, "config": cfg})
 
-    return JSONResponse({"ok": True, "run_id": run_id, "replay_path": replay_path})
+    return {"ok": True, "run_id": run_id, "replay_path": replay_path}
 
 
 @app.get("/api/sim/current")
 async def get_current_sim():
-    return JSONResponse({"run_id": _current_run_id, "config": _current_replay.get("config") if _current_replay else None})
+    return _json({"run_id": _current_run_id, "config": _current_replay.get("config") if _current_replay else None})
 @app.get("/api/sim/config/{run_id}")
 async def get_run_config(run_id: str):
     """
@@ -277,27 +516,18 @@ async def get_run_config(run_id: str):
     if _current_run_id == run_id and _current_replay is not None:
         cfg = _current_replay.get("config")
         if cfg is not None:
-            return JSONResponse(cfg)
+            return _json(cfg)
 
     # otherwise try loading from disk
-    cfg_path = os.path.join(REPLAYS_DIR, f"{run_id}_config.json")
-    if not os.path.exists(cfg_path):
+    if not _RUN_ID_RE.fullmatch(run_id):
         raise HTTPException(status_code=404, detail="config not found")
-    with open(cfg_path, "r", encoding="utf-8") as f:
-        cfg = json.load(f)
-    return JSONResponse(cfg)
-
-
-
-# ----------------------------- DEBUG / EXAMPLE -----------------------------
-
-
-if __name__ == "__main__":
-    import uvicorn
-
-    # Default to port 8000 — change with --port if needed.
-    uvicorn.run(app, host="0.0.0.0", port=8000)
-
+    # the file already is the JSON to send; pass its bytes through without parsing them
+    loop = asyncio.get_running_loop()
+    try:
+        blob = await loop.run_in_executor(None, _load_config_bytes, run_id)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="config not found")
+    return Response(blob, media_type="application/json")
 
 
 # ----------------------------- DEBUG / EXAMPLE -----------------------------
@@ -306,5 +536,8 @@ if __name__ == "__main__":
 if __name__ == "__main__":
     import uvicorn
 
-    # Run the ASGI app directly. Use a different port if 8000 is occupied.
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # Default to port 8000. uvloop has no Windows build, so use asyncio's loop there.
+    # Workers don't share driver_states; keep WEB_CONCURRENCY=1 unless that state moves out of process.
+    uvicorn.run("main:app", host="0.0.0.0", port=8000,
+                loop="asyncio" if sys.platform == "win32" else "uvloop", http="httptools",
+                workers=int(os.getenv("WEB_CONCURRENCY", "1")))
@@ -1,16 +1,19 @@
 # sim_config_api.py
-import os
+import asyncio
 import json
+import os
 from datetime import datetime
-from typing import Dict, Optional, Any
-from fastapi import APIRouter, FastAPI, HTTPException, Body, Query
-from pydantic import BaseModel, Field, validator
+from typing import Dict, Literal, Optional, Any
+import orjson
+from fastapi import APIRouter, FastAPI, HTTPException, Query, Request
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, Field, ValidationError
 
 # Put this file in the same folder as intent_service.py and import the router into your main app:
 # from sim_config_api import router as sim_config_router
 # app.include_router(sim_config_router, prefix="/api/sim")
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
 REPLAY_DIR = "replays"
 os.makedirs(REPLAY_DIR, exist_ok=True)
 
@@ -35,7 +38,7 @@ class AdvancedOptions(BaseModel):
     random_seed: Optional[int] = None
     weather_change: bool = False
     weather_pattern: Optional[str] = "static"
-    event_intensity: Optional[str] = Field("medium")
+    event_intensity: Optional[Literal["low", "medium", "high"]] = "medium"
     enable_crashes: bool = True
     enable_mechanical_failures: bool = True
     enable_energy_management: bool = True
@@ -46,13 +49,6 @@ class AdvancedOptions(BaseModel):
     attack_mode_duration_sec: Optional[int] = None
     attack_mode_activations: Optional[int] = None
 
-    @validator("event_intensity")
-    def check_event_intensity(cls, v):
-        allowed = {"low", "medium", "high"}
-        if v not in allowed:
-            raise ValueError(f"event_intensity must be one of {allowed}")
-        return v
-
 
 class SimConfig(BaseModel):
     race_type: Optional[str] = Field("generic")  # FE, F1 or generic
@@ -61,25 +57,11 @@ class SimConfig(BaseModel):
     num_cars: int = Field(..., ge=1, le=40)
     total_laps: Optional[int] = Field(None, ge=1)
     duration_seconds: Optional[int] = Field(None, ge=1)
-    safety_mode: Optional[str] = Field("none")
-    starting_weather: Optional[str] = Field("sunny")
+    safety_mode: Optional[Literal["none", "strict", "always_on", "disabled"]] = "none"
+    starting_weather: Optional[Literal["sunny", "overcast", "light_rain", "heavy_rain", "windy"]] = "sunny"
     advanced: Optional[AdvancedOptions] = AdvancedOptions()
     drivers: Optional[Dict[str, DriverConfig]] = {}
 
-    @validator("starting_weather")
-    def valid_weather(cls, v):
-        allowed = {"sunny", "overcast", "light_rain", "heavy_rain", "windy"}
-        if v not in allowed:
-            raise ValueError(f"starting_weather must be one of {allowed}")
-        return v
-
-    @validator("safety_mode")
-    def valid_safety(cls, v):
-        allowed = {"none", "strict", "always_on", "disabled"}
-        if v not in allowed:
-            raise ValueError(f"safety_mode must be one of {allowed}")
-        return v
-
 
 # --- Shared state (simple globals to integrate with your existing intent_service) ---
 # NOTE: intent_service.py already has current_run_id and current_replay in its global scope.
@@ -89,18 +71,27 @@ class SimConfig(BaseModel):
 current_run_id: Optional[str] = None
 current_replay: Optional[Dict[str, Any]] = None
 
+def _jdump(path: str, obj: Any) -> None:
+    # orjson encodes to bytes, so write them as-is instead of going through a text file;
+    # json.dumps covers what orjson rejects (e.g. ints beyond 64 bits)
+    try:
+        data = orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    except orjson.JSONEncodeError:
+        data = json.dumps(obj, indent=2).encode("utf-8")
+    with open(path, "wb") as f:
+        f.write(data)
+
 def save_config_file(run_id: str, cfg: Dict[str, Any]) -> str:
     path = os.path.join(REPLAY_DIR, f"{run_id}_config.json")
-    with open(path, "w") as f:
-        json.dump(cfg, f, indent=2)
+    _jdump(path, cfg)
     return path
 
 def load_config_file(run_id: str) -> Dict[str, Any]:
     path = os.path.join(REPLAY_DIR, f"{run_id}_config.json")
     if not os.path.exists(path):
         raise FileNotFoundError(path)
-    with open(path, "r") as f:
-        return json.load(f)
+    with open(path, "rb") as f:
+        return orjson.loads(f.read())
 
 def mk_run_id(name: Optional[str] = None) -> str:
     ts = datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
@@ -114,7 +105,7 @@ def mk_run_id(name: Optional[str] = None) -> str:
 
 
 @router.post("/start", summary="Start a simulation run with the supplied configuration")
-def start_simulation(config: SimConfig = Body(...), force: bool = Query(False, description="Force start even if a run is active")):
+async def start_simulation(request: Request, force: bool = Query(False, description="Force start even if a run is active")):
     """
     Validate and save the simulation configuration. This endpoint initializes a run_id and
     creates a replay skeleton where telemetry and intent predictions will be appended.
@@ -122,11 +113,17 @@ def start_simulation(config: SimConfig = Body(...), force: bool = Query(False, d
     """
     global current_run_id, current_replay
 
+    # validate straight from the raw body; the Literal fields are checked in pydantic-core
+    try:
+        config = SimConfig.model_validate_json(await request.body())
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False))
+
     # create run_id
     run_id = mk_run_id(config.run_name)
 
     # prepare plain dict to save (use by_alias False to keep keys clean)
-    cfg_dict = config.dict()
+    cfg_dict = config.model_dump()
 
     # add run metadata
     cfg_dict["_meta"] = {
@@ -134,8 +131,9 @@ def start_simulation(config: SimConfig = Body(...), force: bool = Query(False, d
         "run_id": run_id
     }
 
-    # Save config file
-    save_config_file(run_id, cfg_dict)
+    # Save config file (off the event loop)
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(None, save_config_file, run_id, cfg_dict)
 
     # initialize replay skeleton for this run (so intent_service can append to it)
     if current_run_id and not force:
@@ -152,8 +150,7 @@ def start_simulation(config: SimConfig = Body(...), force: bool = Query(False, d
 
     # also write initial skeleton to disk immediately
     replay_path = os.path.join(REPLAY_DIR, f"{run_id}.json")
-    with open(replay_path, "w") as f:
-        json.dump(current_replay, f, indent=2)
+    await loop.run_in_executor(None, _jdump, replay_path, current_replay)
 
     return {"ok": True, "run_id": run_id, "replay_path": replay_path}
 
@@ -174,10 +171,9 @@ def get_current():
 
 @router.get("/list", summary="List saved simulation config run IDs")
 def list_runs():
-    files = os.listdir(REPLAY_DIR)
-    runs = []
-    for f in files:
-        if f.endswith("_config.json"):
-            runs.append(f.replace("_config.json", ""))
+    suffix = "_config.json"
+    # scandir's entries carry the file type, so is_file() needs no extra stat on most platforms
+    with os.scandir(REPLAY_DIR) as it:
+        runs = [e.name[:-len(suffix)] for e in it if e.name.endswith(suffix) and e.is_file()]
     runs.sort(reverse=True)
     return {"runs": runs}
@@ -9,22 +9,34 @@ If --run-id omitted, it will try to use /api/sim/current to find the active run_
 This edited version has the global declarations fixed and is cleaned up.
 """
 
-import threading
+import asyncio
+import multiprocessing as mp
+import os
 import time
-import random
 import argparse
 import requests
-import math
+import signal
 import sys
+import zlib
+import aiohttp
+import numpy as np
+import numba
+from numba import njit, prange
+import orjson
 
 # Configuration: backend URL (change if your backend runs elsewhere)
 BACKEND_HOST = "http://127.0.0.1:8000"
 GET_CONFIG_ENDPOINT = "/api/sim/config/{}"
 GET_CURRENT_ENDPOINT = "/api/sim/current"
 TELEMETRY_ENDPOINT = "/telemetry"
+JSON_HEADERS = {"Content-Type": "application/json"}
+# keep-alive session for the blocking config requests made before the ticker starts
+SESSION = requests.Session()
 
 # Simulation tick (ms)
 TICK_MS = 300
+# ticks of random variates drawn per refill of DriverGrid's buffers
+RNG_BATCH_TICKS = 64
 
 # Simple mapping: tyre compound -> base_speed_delta, wear_rate
 TYRE_PROFILE = {
@@ -50,12 +62,20 @@ STRATEGY_PIT_OFFSET = {
     "defensive": +1,
     "weather_dependent": 0,
 }
-
-# Safety: clamp helpers
-def clamp(v, a, b):
-    return max(a, min(b, v))
-
-# DriverState holds runtime dynamic values
+# thermal_rate -> grip factor applied to base speed
+THERMAL_FACTOR = {"hot": 1.05, "cool": 0.97, "cold": 0.92, "optimal": 1.0}
+
+# the profiles above as lookup tables indexed by a small integer id per compound / mode
+TYRE_IDX = {name: i for i, name in enumerate(TYRE_PROFILE)}
+TYRE_SPEED_DELTA = np.array([p["speed_delta"] for p in TYRE_PROFILE.values()], dtype=np.float32)
+TYRE_WEAR = np.array([p["wear_rate"] for p in TYRE_PROFILE.values()], dtype=np.float32)
+TYRE_WARMUP = np.array([p["warmup"] for p in TYRE_PROFILE.values()], dtype=np.float32)
+AGG_IDX = {name: i for i, name in enumerate(AGGRESSION_PROFILE)}
+AGG_THROTTLE = np.array([p["throttle_bias"] for p in AGGRESSION_PROFILE.values()], dtype=np.float32)
+AGG_BRAKE = np.array([p["brake_bias"] for p in AGGRESSION_PROFILE.values()], dtype=np.float32)
+AGG_RISK = np.array([p["risk"] for p in AGGRESSION_PROFILE.values()], dtype=np.float32)
+
+# DriverState resolves one driver's config into the per-driver constants the grid step uses
 class DriverState:
     def __init__(self, driver_id, cfg, global_cfg):
         self.driver_id = driver_id
@@ -70,170 +90,267 @@ class DriverState:
             self.aggression = "balanced"
         self.strategy = self.cfg.get("strategy") or self.global_cfg.get("strategy") or "standard"
         self.thermal = self.cfg.get("thermal_rate") or self.global_cfg.get("thermal_rate") or "optimal"
+        self.seed = self.cfg.get("seed") or self.global_cfg.get("seed")
+
+        # profile ids into the TYRE_* / AGG_* lookup tables
+        self.tyre_idx = TYRE_IDX[self.tyre_compound]
+        self.agg_idx = AGG_IDX[self.aggression]
+        self.thermal_factor = THERMAL_FACTOR.get(self.thermal, 1.0)
+        # wear multipliers: hot tyres and overdrive both chew rubber faster
+        self.hot_wear_mult = 1.05 if self.thermal == "hot" else 1.0
+        self.overdrive_wear_mult = 1.12 if self.aggression == "overdrive" else 1.0
+        self.pit_offset = STRATEGY_PIT_OFFSET.get(self.strategy, 0)
+        # stationary pit time (s); strategy may shorten or lengthen it
+        self.pit_base = float(self.cfg.get("pit_time_sec", self.global_cfg.get("pit_time_sec", 20.0)))
+        if self.strategy == "undercut":
+            self.pit_base *= 0.95
+        elif self.strategy == "overcut":
+            self.pit_base *= 1.05
+
+
+@njit(parallel=True, fastmath=True, cache=True)
+def _vstep_nb(dt, normals, uniforms,
+              top_speed, wear_rate, warmup, throttle_mu, brake_mu, crash_p, pit_ticks,
+              tyre_wear, tyre_temp, lap, lap_progress, in_pit, pit_cooldown, next_pit_lap,
+              speed_out, throttle_out, brake_out):
+    # one tick for every driver, updating the dynamic arrays in place; drivers are independent,
+    # so the loop is split across threads. normals: (throttle, brake) x N, uniforms: (noise, crash, severity) x N
+    for i in prange(top_speed.shape[0]):
+        # 1) throttle & brake influenced by aggression, with random fluctuation
+        throttle = min(max(throttle_mu[i] + 12.0 * normals[0, i], 0.0), 100.0)
+        brake = min(max(brake_mu[i] + 8.0 * normals[1, i], 0.0), 100.0)
+        thr = throttle / 100.0
+
+        # 2) speed from tyre/thermal top speed, minus grip lost to wear, plus noise in [-1.5, 1.5)
+        speed = min(max(top_speed[i] * thr - 0.12 * tyre_wear[i] + (3.0 * uniforms[0, i] - 1.5), 5.0), 80.0)
+
+        # 3) tyre wear and 4) tyre temp
+        tyre_wear[i] += wear_rate[i] * (1.0 + thr) * dt
+        tyre_temp[i] = max(20.0, tyre_temp[i] + thr * (1.0 + tyre_wear[i]) * warmup[i] * 0.8 * dt)
+
+        # 5) lap progress
+        lap_progress[i] += (speed / 60.0) * dt * 0.01
+        if lap_progress[i] >= 1.0:
+            lap[i] += 1
+            lap_progress[i] -= 1.0
+
+        # 6) pit: enter on the planned lap, crawl through for pit_ticks
+        if not in_pit[i] and next_pit_lap[i] >= 0 and lap[i] >= next_pit_lap[i]:
+            in_pit[i] = True
+            pit_cooldown[i] = pit_ticks[i]
+        if in_pit[i]:
+            pit_cooldown[i] -= 1
+            speed = 1.0
+            throttle = 0.0
+            brake = 20.0
+            if pit_cooldown[i] <= 0:
+                in_pit[i] = False
+                # plan no more pits by setting next_pit_lap far in the future
+                next_pit_lap[i] = lap[i] + 999
+
+        # 7) incidents: a spin slows the driver and adds braking
+        if uniforms[1, i] < crash_p[i]:
+            severity = 0.1 + 0.5 * uniforms[2, i]
+            speed = max(3.0, speed * (1.0 - severity))
+            brake = min(100.0, brake + 30.0)
+
+        speed_out[i] = speed
+        throttle_out[i] = throttle
+        brake_out[i] = brake
+
+
+class DriverGrid:
+    """
+    Every simulated driver as parallel NumPy arrays (one entry per driver), advanced together by step().
+    Static columns come from each DriverState; dynamic ones (wear, temp, lap, pit) evolve per tick.
+    Quantities are float32 and counters int32: ample range here, half the memory traffic per pass.
+    """
+
+    def __init__(self, states, cfg_run, tick_ms=TICK_MS):
+        n = len(states)
+        self.tick_ms = tick_ms
+        self.driver_ids = [st.driver_id for st in states]
+        # the per-driver fields that never change, pre-encoded as the opening of each packet's JSON
+        self.json_prefixes = [orjson.dumps({"driver_id": st.driver_id, "tyre_compound": st.tyre_compound,
+                                            "strategy": st.strategy})[:-1] + b"," for st in states]
+        cfg_run = cfg_run or {}
+        self.total_laps = cfg_run.get("total_laps") or cfg_run.get("num_laps") or cfg_run.get("duration_seconds", 0)
+
+        # one generator for the grid; seeded (deterministically) from the drivers' seeds if any are set
+        entropy = [zlib.crc32(f"{st.seed}_{st.driver_id}".encode()) for st in states if st.seed is not None]
+        self.rng = np.random.default_rng(entropy or None)
+
+        def col(attr):
+            return np.array([getattr(st, attr) for st in states], dtype=np.float32)
+
+        # static per-driver constants, gathered from the profile tables by id
+        self.tyre_idx = np.array([st.tyre_idx for st in states], dtype=np.int32)
+        self.agg_idx = np.array([st.agg_idx for st in states], dtype=np.int32)
+        self.top_speed = (col("base_speed") + TYRE_SPEED_DELTA[self.tyre_idx]) * col("thermal_factor")
+        self.wear_rate = TYRE_WEAR[self.tyre_idx] * col("hot_wear_mult") * col("overdrive_wear_mult")
+        self.warmup = TYRE_WARMUP[self.tyre_idx]
+        self.throttle_mu = 50.0 * AGG_THROTTLE[self.agg_idx]
+        self.brake_mu = 10.0 * AGG_BRAKE[self.agg_idx]
+        self.crash_p = 0.0005 + AGG_RISK[self.agg_idx] * 0.001
+        self.pit_offset = np.array([st.pit_offset for st in states], dtype=np.int32)
+        self.pit_ticks = np.maximum(1, (col("pit_base") * 1000.0 / tick_ms).astype(np.int32))
+        self.position_x = 500.0 * self.rng.random(n, dtype=np.float32)
+        self.position_y = 500.0 * self.rng.random(n, dtype=np.float32)
+        self.yaw = np.zeros(n, dtype=np.float32)
 
         # dynamic state
-        self.tyre_wear = 0.0           # cumulative wear
-        self.tyre_temp = 30.0         # degrees C
-        self.lap = 0
-        self.lap_progress = 0.0
-        self.position_x = random.uniform(0,500)
-        self.position_y = random.uniform(0,500)
-        self.yaw = 0.0
-        self.in_pit = False
-        self.pit_cooldown = 0         # ticks left for pit stop
-        self.next_pit_lap = None      # plan next pit lap based on strategy
-        self.random = random.Random()
-        # seed optionally per driver if provided
-        seed = self.cfg.get("seed") or self.global_cfg.get("seed")
-        if seed is not None:
-            try:
-                sid = f"{seed}_{driver_id}"
-                self.random.seed(hash(sid) & 0xffffffff)
-            except Exception:
-                pass
-
-    def plan_pit_lap(self, total_laps):
+        self.tyre_wear = np.zeros(n, dtype=np.float32)         # cumulative wear
+        self.tyre_temp = np.full(n, 30.0, dtype=np.float32)    # degrees C
+        self.lap = np.zeros(n, dtype=np.int32)
+        self.lap_progress = np.zeros(n, dtype=np.float32)
+        self.in_pit = np.zeros(n, dtype=bool)
+        self.pit_cooldown = np.zeros(n, dtype=np.int32)   # ticks left for pit stop
+        self.next_pit_lap = np.full(n, -1, dtype=np.int32)  # -1 = no pit (race length unknown)
+        self.plan_pit_laps()
+
+        # random variates for RNG_BATCH_TICKS ticks at a time: per tick, 2 normals
+        # (throttle, brake) and 3 uniforms (noise, crash roll, severity) per driver
+        self._normals = self._uniforms = None
+        self._tick_in_batch = RNG_BATCH_TICKS
+
+    def _draws(self):
+        if self._tick_in_batch == RNG_BATCH_TICKS:
+            n = len(self.driver_ids)
+            self._normals = self.rng.standard_normal((RNG_BATCH_TICKS, 2, n), dtype=np.float32)
+            self._uniforms = self.rng.random((RNG_BATCH_TICKS, 3, n), dtype=np.float32)
+            self._tick_in_batch = 0
+        i = self._tick_in_batch
+        self._tick_in_batch += 1
+        return self._normals[i], self._uniforms[i]
+
+    def plan_pit_laps(self):
         # Basic heuristic: plan mid-race or based on strategy offset
-        base = max(1, int(total_laps * 0.4))
-        offset = STRATEGY_PIT_OFFSET.get(self.strategy, 0)
-        planned = clamp(base + offset + int(self.random.uniform(-2,2)), 1, total_laps)
-        self.next_pit_lap = planned
-
-# Simulate one tick for a driver and return telemetry dict
-def simulate_tick(state: DriverState, cfg_run: dict, tick_ms=TICK_MS):
-    # 1) compute throttle & brake influenced by aggression
-    ag = AGGRESSION_PROFILE[state.aggression]
-    # small random fluctuation
-    throttle_pct = clamp(state.random.gauss(50 * ag["throttle_bias"], 12), 0, 100)
-    brake_pct = clamp(state.random.gauss(10 * ag["brake_bias"], 8), 0, 100)
-
-    # 2) tyre profile effects
-    tyre_info = TYRE_PROFILE.get(state.tyre_compound, TYRE_PROFILE["medium"])
-    base_speed = state.base_speed + tyre_info["speed_delta"]  # base m/s influenced by tyre
-    # thermal influence: hot -> quicker warmup but faster wear; cold -> slower grip
-    thermal_factor = 1.0
-    if state.thermal == "hot":
-        thermal_factor = 1.05
-    elif state.thermal == "cool":
-        thermal_factor = 0.97
-    elif state.thermal == "cold":
-        thermal_factor = 0.92
-    elif state.thermal == "optimal":
-        thermal_factor = 1.0
-
-    # speed loss due to tyre wear (grip loss)
-    speed_loss = 0.12 * state.tyre_wear   # tuneable constant
-    # random noise
-    noise = state.random.uniform(-1.5, 1.5)
-
-    # current speed
-    speed_mps = clamp((base_speed * thermal_factor) * (throttle_pct/100.0) - speed_loss + noise, 5.0, 80.0)
-
-    # 3) tyre wear accumulation depends on throttle and tyre wear rate
-    wear_rate = tyre_info["wear_rate"] * (1.0 + (throttle_pct/100.0)) * (1.0 + (0.05 if state.thermal=="hot" else 0.0))
-    # aggression increases wear slightly
-    wear_rate *= (1.0 + (0.12 if state.aggression == "overdrive" else 0.0))
-    state.tyre_wear += wear_rate * (tick_ms/1000.0)
-
-    # 4) tyre temp evolves: increases with throttle and with wear
-    temp_rise = (throttle_pct/100.0) * (1.0 + state.tyre_wear) * tyre_info["warmup"] * 0.8
-    state.tyre_temp = max(20.0, state.tyre_temp + temp_rise * (tick_ms/1000.0))
-
-    # 5) lap progress update (simplified)
-    # assume track length corresponds to a lap_time proportional to speed.
-    # Convert speed to a lap_progress delta:
-    # faster speed -> larger progress increment per tick.
-    progress_delta = (speed_mps / 60.0) * (tick_ms/1000.0) * 0.01  # tuned scaling
-    state.lap_progress += progress_delta
-    if state.lap_progress >= 1.0:
-        state.lap += 1
-        state.lap_progress -= 1.0
-        # if next_pit_lap not planned, plan now (first lap planning)
-        if state.next_pit_lap is None and cfg_run:
-            total_laps = cfg_run.get("total_laps") or cfg_run.get("num_laps") or cfg_run.get("duration_seconds", 0)
-            if total_laps:
-                state.plan_pit_lap(total_laps)
-
-    # 6) Pit logic: enter pit if planned and on lap
-    # simplistic pit duration based on strategy and tyre change
-    if state.next_pit_lap is not None and state.lap >= state.next_pit_lap and not state.in_pit:
-        # Enter pit
-        state.in_pit = True
-        # pit_time base (seconds)
-        pit_base = float(state.cfg.get("pit_time_sec", state.global_cfg.get("pit_time_sec", 20.0)))
-        # strategy may shorten or lengthen stationary pit
-        if state.strategy == "undercut":
-            pit_base *= 0.95
-        elif state.strategy == "overcut":
-            pit_base *= 1.05
-        # convert to ticks
-        state.pit_cooldown = max(1, int((pit_base * 1000.0) / tick_ms))
-        # while in pit, speed will be very low and lap_progress slowed
-    if state.in_pit:
-        state.pit_cooldown -= 1
-        # while in pit set minimal speed and braking slightly higher
-        speed_mps = 1.0
-        throttle_pct = 0.0
-        brake_pct = 20.0
-        if state.pit_cooldown <= 0:
-            state.in_pit = False
-            # plan no more pits by setting next_pit_lap far in the future
-            state.next_pit_lap = (state.lap + 999)
-
-    # 7) Crash / incident chance influenced by aggression and risk
-    base_crash_prob = 0.0005
-    risk = AGGRESSION_PROFILE[state.aggression]["risk"]
-    crash_roll = state.random.random()
-    incident = None
-    if crash_roll < (base_crash_prob + risk * 0.001):
-        # small incident: spin or minor crash that slows driver for a few ticks
-        incident = {"type": "spin", "severity": state.random.uniform(0.1, 0.6)}
-        # apply effect: drop speed & increase brake for few ticks
-        speed_mps = max(3.0, speed_mps * (1.0 - incident["severity"]))
-        brake_pct = min(100.0, brake_pct + 30.0)
-
-    # 8) build telemetry packet
-    now_ms = int(time.time() * 1000)
-    pkt = {
-        "driver_id": state.driver_id,
-        "timestamp_ms": now_ms,
-        "lap": state.lap,
-        "lap_progress": round(state.lap_progress, 4),
-        "speed_mps": round(speed_mps, 3),
-        "position_x": round(state.position_x + state.lap_progress*5.0, 3),
-        "position_y": round(state.position_y + state.lap_progress*2.0, 3),
-        "yaw": round(state.yaw, 3),
-        "throttle_pct": round(throttle_pct, 2),
-        "brake_pct": round(brake_pct, 2),
-        "tyre_temp": round(state.tyre_temp, 2),
-        # optional: expose internal state for analytics
-        "tyre_compound": state.tyre_compound,
-        "tyre_wear": round(state.tyre_wear, 4),
-        "in_pit": state.in_pit,
-        "strategy": state.strategy
-    }
-    # return pkt and any local incident discovered
-    return pkt, incident
-
-# Worker thread: sends telemetry continuously
-def driver_loop(driver_id, state: DriverState, cfg_run, stop_event):
-    url = BACKEND_HOST + TELEMETRY_ENDPOINT
-    while not stop_event.is_set():
-        pkt, incident = simulate_tick(state, cfg_run, TICK_MS)
-        try:
-            r = requests.post(url, json=pkt, timeout=1.0)
-            if r.status_code == 200:
-                body = r.json()
+        if not self.total_laps:
+            return
+        base = max(1, int(self.total_laps * 0.4))
+        jitter = self.rng.uniform(-2, 2, len(self.driver_ids)).astype(np.int32)  # truncates toward 0 like int()
+        self.next_pit_lap[:] = np.clip(base + self.pit_offset + jitter, 1, self.total_laps)
+
+    def step(self):
+        """Advance every driver one tick; returns (speed_mps, throttle_pct, brake_pct) arrays."""
+        normals, uniforms = self._draws()
+        n = len(self.driver_ids)
+        speed_mps = np.empty(n, dtype=np.float32)
+        throttle_pct = np.empty(n, dtype=np.float32)
+        brake_pct = np.empty(n, dtype=np.float32)
+        _vstep_nb(self.tick_ms / 1000.0, normals, uniforms,
+                  self.top_speed, self.wear_rate, self.warmup, self.throttle_mu, self.brake_mu,
+                  self.crash_p, self.pit_ticks,
+                  self.tyre_wear, self.tyre_temp, self.lap, self.lap_progress,
+                  self.in_pit, self.pit_cooldown, self.next_pit_lap,
+                  speed_mps, throttle_pct, brake_pct)
+        return speed_mps, throttle_pct, brake_pct
+
+    def packets(self, speed_mps, throttle_pct, brake_pct):
+        """
+        One step's telemetry per driver as (driver_id, fields, body): fields holds only the values that
+        change per tick, body is the full JSON packet (constant prefix + encoded fields).
+        """
+        now_ms = int(time.time() * 1000)
+        # full-precision values; anything that displays them rounds for itself. Floats stay numpy
+        # float32 scalars so orjson (OPT_SERIALIZE_NUMPY) writes their short float32 form
+        cols = zip(self.lap.tolist(), self.lap_progress, speed_mps,
+                   self.position_x + self.lap_progress * 5.0,
+                   self.position_y + self.lap_progress * 2.0,
+                   self.yaw, throttle_pct, brake_pct,
+                   self.tyre_temp, self.tyre_wear, self.in_pit.tolist())
+        fields = [{
+            "timestamp_ms": now_ms,
+            "lap": lap,
+            "lap_progress": prog,
+            "speed_mps": spd,
+            "position_x": px,
+            "position_y": py,
+            "yaw": yaw,
+            "throttle_pct": thr,
+            "brake_pct": brk,
+            "tyre_temp": temp,
+            # optional: expose internal state for analytics
+            "tyre_wear": wear,
+            "in_pit": in_pit,
+        } for lap, prog, spd, px, py, yaw, thr, brk, temp, wear, in_pit in cols]
+        # stitch: prefix ends in ',' and the encoded fields' leading '{' is dropped
+        return [(did, f, prefix + orjson.dumps(f, option=orjson.OPT_SERIALIZE_NUMPY)[1:])
+                for did, f, prefix in zip(self.driver_ids, fields, self.json_prefixes)]
+
+
+async def send_packet(session: aiohttp.ClientSession, url, driver_id, pkt, body):
+    try:
+        async with session.post(url, data=body, headers=JSON_HEADERS) as r:
+            if r.status == 200:
+                body = orjson.loads(await r.read())
                 # backend returns predicted intent in response
                 intent = body.get("predicted_intent") or body.get("intent")
                 conf = body.get("confidence") or 0.0
-                print(f"[{driver_id}] lap={pkt['lap']} prog={pkt['lap_progress']} speed={pkt['speed_mps']} intent={intent} conf={conf:.2f}")
+                print(f"[{driver_id}] lap={pkt['lap']} prog={pkt['lap_progress']:.4f} speed={pkt['speed_mps']:.3f} intent={intent} conf={conf:.2f}")
             else:
-                print(f"[{driver_id}] HTTP {r.status_code} {r.text}")
-        except Exception as e:
-            print(f"[{driver_id}] error: {e}")
-        # small sleep until next tick
-        time.sleep(TICK_MS / 1000.0)
+                print(f"[{driver_id}] HTTP {r.status} {await r.text()}")
+    except Exception as e:
+        print(f"[{driver_id}] error: {e}")
+
+
+# Ticker: advances the whole grid once per tick and sends every driver's telemetry
+async def run_sim(grid: DriverGrid, stop: asyncio.Event = None):
+    """Tick until stop is set (checked between ticks and while waiting for the next one)."""
+    if stop is None:
+        stop = asyncio.Event()
+        if sys.platform != "win32":
+            # SIGTERM ends the run between ticks, with the session closed cleanly
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stop.set)
+    url = BACKEND_HOST + TELEMETRY_ENDPOINT
+    # one keep-alive connection pool for every driver's posts
+    connector = aiohttp.TCPConnector(limit=0, keepalive_timeout=30)
+    period = TICK_MS / 1000.0
+    async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=1.0)) as session:
+        next_deadline = time.monotonic()
+        while not stop.is_set():
+            next_deadline += period
+            pkts = grid.packets(*grid.step())
+            # all posts in flight at once; the tick waits for them, as each driver thread used to
+            await asyncio.gather(*(send_packet(session, url, *p) for p in pkts))
+            # sleep only what is left of this tick, so step + post time doesn't stretch the period
+            delay = next_deadline - time.monotonic()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(stop.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+            elif delay < -period:
+                # more than a tick behind: start counting again from now rather than bursting to catch up
+                next_deadline = time.monotonic()
+
+# Shard worker: one process advancing its own grid over a subset of the drivers
+async def _shard_sim(grid: DriverGrid, mp_stop):
+    stop = asyncio.Event()
+
+    async def watch():
+        while not mp_stop.is_set():
+            await asyncio.sleep(0.1)
+        stop.set()
+
+    watcher = asyncio.create_task(watch())
+    try:
+        await run_sim(grid, stop)
+    finally:
+        watcher.cancel()
+
+
+def _run_shard(states, cfg, host, tick_ms, threads, mp_stop):
+    global BACKEND_HOST, TICK_MS
+    # spawned workers re-import this module, so the CLI overrides are passed in explicitly
+    BACKEND_HOST, TICK_MS = host, tick_ms
+    # share the cores between the shards' step kernels rather than each using all of them
+    numba.set_num_threads(threads)
+    grid = DriverGrid(states, cfg, tick_ms)
+    try:
+        asyncio.run(_shard_sim(grid, mp_stop))
+    except KeyboardInterrupt:
+        pass
 
 # Main: fetch config and launch drivers
 def main():
@@ -243,6 +360,7 @@ def main():
     parser.add_argument("--run-id", type=str, default=None, help="run_id from /api/sim/start (optional)")
     parser.add_argument("--host", type=str, default=BACKEND_HOST, help="backend host (includes protocol and port)")
     parser.add_argument("--tick-ms", type=int, default=300, help="tick in ms")
+    parser.add_argument("--procs", type=int, default=1, help="processes to shard the drivers across (0 = one per CPU)")
     args = parser.parse_args()
 
     BACKEND_HOST = args.host
@@ -254,9 +372,9 @@ def main():
     if run_id is None:
         # ask backend for current run
         try:
-            r = requests.get(BACKEND_HOST + GET_CURRENT_ENDPOINT, timeout=2.0)
+            r = SESSION.get(BACKEND_HOST + GET_CURRENT_ENDPOINT, timeout=2.0)
             r.raise_for_status()
-            info = r.json()
+            info = orjson.loads(r.content)
             run_id = info.get("run_id")
             if run_id:
                 print(f"Discovered active run_id: {run_id}")
@@ -267,9 +385,9 @@ def main():
 
     # fetch full config
     try:
-        r = requests.get(BACKEND_HOST + GET_CONFIG_ENDPOINT.format(run_id), timeout=3.0)
+        r = SESSION.get(BACKEND_HOST + GET_CONFIG_ENDPOINT.format(run_id), timeout=3.0)
         r.raise_for_status()
-        cfg = r.json()
+        cfg = orjson.loads(r.content)
     except Exception as e:
         print("Failed to fetch run config:", e)
         sys.exit(1)
@@ -289,28 +407,39 @@ def main():
     # global defaults
     global_defaults = cfg.get("global", {})
 
-    # create and start threads
-    stop_event = threading.Event()
-    threads = []
-    states = {}
-    for did, dcfg in drivers_map.items():
-        state = DriverState(did, dcfg, global_defaults)
-        states[did] = state
-
-        t = threading.Thread(target=driver_loop, args=(did, state, cfg, stop_event), daemon=True)
-        t.start()
-        threads.append(t)
-        time.sleep(0.05)  # stagger startup slightly
+    states = [DriverState(did, dcfg, global_defaults) for did, dcfg in drivers_map.items()]
+    procs = max(1, min(args.procs or os.cpu_count() or 1, len(states)))
 
-    print(f"Started {len(threads)} simulated drivers. Press Ctrl+C to stop.")
-    try:
-        while True:
-            time.sleep(1.0)
-    except KeyboardInterrupt:
-        print("Stopping simulator...")
-        stop_event.set()
-        time.sleep(0.5)
-        print("Simulator stopped.")
+    if procs == 1:
+        # one grid for all drivers, advanced on a single event loop
+        grid = DriverGrid(states, cfg, TICK_MS)
+        print(f"Started {len(states)} simulated drivers. Press Ctrl+C to stop.")
+        try:
+            asyncio.run(run_sim(grid))
+        except KeyboardInterrupt:
+            # asyncio.run has already cancelled the ticker and closed the session
+            pass
+    else:
+        # one grid per process, drivers dealt round-robin; each worker ticks independently
+        mp_stop = mp.Event()
+        if sys.platform != "win32":
+            # SIGTERM to the parent alone stops the workers between ticks instead of orphaning them
+            signal.signal(signal.SIGTERM, lambda signum, frame: mp_stop.set())
+        threads = max(1, min(numba.config.NUMBA_NUM_THREADS, (os.cpu_count() or 1) // procs))
+        workers = [mp.Process(target=_run_shard, args=(states[i::procs], cfg, BACKEND_HOST, TICK_MS, threads, mp_stop),
+                              daemon=True) for i in range(procs)]
+        for w in workers:
+            w.start()
+        print(f"Started {len(states)} simulated drivers in {procs} processes. Press Ctrl+C to stop.")
+        try:
+            for w in workers:
+                w.join()
+        except KeyboardInterrupt:
+            # the workers see the Ctrl+C too; the event covers any that missed it
+            mp_stop.set()
+            for w in workers:
+                w.join()
+    print("Simulator stopped.")
 
 
 if __name__ == "__main__":
@@ -2,15 +2,23 @@
 # backend/telemetry_emitter.py
 """
 Resilient TelemetryEmitter.
-Drop-in replacement: defines TelemetryEmitter and NullTelemetry.
+Drop-in replacement: defines TelemetryEmitter and NullTelemetry,
+plus UringTelemetryEmitter (io_uring writes; needs the optional liburing package).
 """
 
+import json
 import socket
+import threading
 import time
-import json
+import orjson
 import logging
 from typing import Optional
 
+try:
+    import liburing  # optional, Linux only: io_uring backend for UringTelemetryEmitter
+except ImportError:
+    liburing = None
+
 logger = logging.getLogger(__name__)
 
 class NullTelemetry:
@@ -24,6 +32,9 @@ class NullTelemetry:
     def maybe_send_heartbeat(self, meta: dict):
         pass
 
+    def flush(self):
+        pass
+
     def close(self):
         logger.info("NullTelemetry: close() called (no-op)")
 
@@ -32,13 +43,21 @@ class TelemetryEmitter:
     def __init__(self, host: str = "127.0.0.1", port: int = 6000,
                  max_retries: int = 6, base_backoff: float = 0.5,
                  heartbeat_interval: Optional[int] = 10,
-                 sock_timeout: float = 2.0):
+                 sock_timeout: float = 2.0,
+                 buf_max: int = 16384, flush_interval: float = 0.5):
         self.host = host
         self.port = int(port)
         self.max_retries = max_retries
         self.base_backoff = base_backoff
         self.heartbeat_interval = heartbeat_interval
         self.sock_timeout = sock_timeout
+        # payloads are coalesced here and written with one sendall per flush: when buf_max bytes
+        # are pending, or at the latest flush_interval seconds after the first one was buffered
+        self.buf_max = buf_max
+        self.flush_interval = flush_interval
+        self._buf = bytearray()
+        self._timer: Optional[threading.Timer] = None
+        self._lock = threading.RLock()  # the flush timer runs on its own thread
 
         self.sock: Optional[socket.socket] = None
         self.last_heartbeat_ts = 0.0
@@ -75,27 +94,70 @@ class TelemetryEmitter:
             logger.debug("TelemetryEmitter: not connected — dropping telemetry payload.")
             return
         try:
-            data = json.dumps(payload, default=str).encode("utf-8") + b"\n"
-            self.sock.sendall(data)
-            logger.debug("TelemetryEmitter: sent payload (len=%d)", len(data))
+            try:
+                data = orjson.dumps(payload, default=str, option=orjson.OPT_NON_STR_KEYS) + b"\n"
+            except orjson.JSONEncodeError:
+                # orjson rejects some values json.dumps takes (ints beyond 64 bits); fall back to it
+                data = json.dumps(payload, default=str).encode("utf-8") + b"\n"
+        except Exception as exc:
+            logger.exception("TelemetryEmitter: could not encode payload — dropping it: %s", exc)
+            return
+        with self._lock:
+            self._buf += data
+            logger.debug("TelemetryEmitter: buffered payload (len=%d, pending=%d)", len(data), len(self._buf))
+            if len(self._buf) >= self.buf_max or not self.flush_interval:
+                self._flush_buffer()
+            else:
+                self._arm_timer()
+
+    def _arm_timer(self):
+        # deadline for the pending batch, so it goes out even if no further send() comes
+        if self._timer is None:
+            self._timer = threading.Timer(self.flush_interval or 0.001, self._on_timer)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _on_timer(self):
+        with self._lock:
+            self._timer = None
+            self._flush_buffer()
+            if self._buf:
+                self._arm_timer()
+
+    def flush(self):
+        """Write every buffered payload in one sendall; on failure the batch is dropped."""
+        with self._lock:
+            self._flush_buffer()
+
+    def _flush_buffer(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._buf:
+            return
+        try:
+            if self.sock is None:
+                logger.debug("TelemetryEmitter: not connected — dropping %d buffered bytes.", len(self._buf))
+                return
+            self.sock.sendall(self._buf)
+            logger.debug("TelemetryEmitter: flushed %d bytes", len(self._buf))
         except (BlockingIOError, BrokenPipeError, ConnectionResetError, socket.error) as exc:
             logger.warning("TelemetryEmitter: send failed (%s) — closing socket and deferring reconnect", exc)
-            try:
-                if self.sock:
-                    self.sock.close()
-            except Exception:
-                pass
-            self.sock = None
-            self.connected = False
+            self._drop_socket()
         except Exception as exc:
             logger.exception("TelemetryEmitter: unexpected error on send — dropping payload: %s", exc)
-            try:
-                if self.sock:
-                    self.sock.close()
-            except Exception:
-                pass
-            self.sock = None
-            self.connected = False
+            self._drop_socket()
+        finally:
+            self._buf.clear()
+
+    def _drop_socket(self):
+        try:
+            if self.sock:
+                self.sock.close()
+        except Exception:
+            pass
+        self.sock = None
+        self.connected = False
 
     def maybe_send_heartbeat(self, meta: dict):
         if not self.heartbeat_interval:
@@ -107,14 +169,106 @@ class TelemetryEmitter:
         heartbeat = {"type": "heartbeat", "ts": now, "meta": meta}
         logger.debug("TelemetryEmitter: sending heartbeat")
         self.send(heartbeat)
+        self.flush()
 
     def close(self):
-        try:
-            if self.sock:
-                self.sock.close()
-        except Exception:
-            pass
-        self.sock = None
-        self.connected = False
+        with self._lock:
+            self._flush_buffer()
+            self._drop_socket()
         logger.info("TelemetryEmitter: closed")
 
+
+class UringTelemetryEmitter(TelemetryEmitter):
+    """
+    TelemetryEmitter whose flushes are io_uring writes: each flushed batch is one submission and
+    its completion is reaped on a later flush instead of waited for. One write is in flight at a
+    time so the line stream stays ordered; payloads keep buffering behind it meanwhile.
+    Falls back to plain sendall when liburing is missing or io_uring cannot be set up.
+    """
+    def __init__(self, *args, ring_entries: int = 8, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.ring_entries = ring_entries
+        self._ring = None
+        self._cqe = None
+        self._inflight: Optional[bytes] = None  # batch being written; kept alive until it completes
+
+    def connect(self):
+        super().connect()
+        if not self.connected or liburing is None or self._ring is not None:
+            return
+        ring = liburing.Ring()
+        try:
+            liburing.io_uring_queue_init(self.ring_entries, ring)
+        except OSError as exc:
+            logger.warning("UringTelemetryEmitter: io_uring unavailable (%s) — using sendall", exc)
+            return
+        self._ring, self._cqe = ring, liburing.Cqe()
+        # the ring waits for socket space itself, so the fd goes back to blocking mode
+        self.sock.settimeout(None)
+        logger.info("UringTelemetryEmitter: io_uring ready (%d entries)", self.ring_entries)
+
+    def _submit(self, data: bytes):
+        sqe = liburing.io_uring_get_sqe(self._ring)
+        liburing.io_uring_prep_write(sqe, self.sock.fileno(), data)
+        liburing.io_uring_submit(self._ring)
+        self._inflight = data
+
+    def _reap(self, wait: bool = False):
+        """Collect the in-flight write's completion (raises OSError if it failed); short writes resubmit the rest."""
+        while self._inflight is not None:
+            try:
+                liburing.io_uring_peek_cqe(self._ring, self._cqe)
+            except BlockingIOError:
+                if not wait:
+                    return  # still in flight
+                # io_uring_wait_cqe would block holding the GIL; sleep between peeks instead
+                time.sleep(0.001)
+                continue
+            res = self._cqe[0].res
+            liburing.io_uring_cq_advance(self._ring, 1)
+            data, self._inflight = self._inflight, None
+            liburing.trap_error(res)
+            if res < len(data):
+                self._submit(data[res:])
+
+    def _flush_buffer(self):
+        if self._ring is None:
+            return super()._flush_buffer()
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        try:
+            self._reap()
+            if self._inflight is not None:
+                if len(self._buf) < 4 * self.buf_max:
+                    # keep batching behind the write in flight; the timer submits it later
+                    self._arm_timer()
+                    return
+                self._reap(wait=True)
+            if self._buf:
+                self._submit(bytes(self._buf))
+                logger.debug("UringTelemetryEmitter: submitted %d bytes", len(self._buf))
+                self._buf.clear()
+        except OSError as exc:
+            logger.warning("UringTelemetryEmitter: write failed (%s) — closing socket and deferring reconnect", exc)
+            self._drop_socket()
+            self._buf.clear()
+
+    def _drop_socket(self):
+        if self._ring is not None:
+            # tearing the ring down cancels a write still in flight
+            liburing.io_uring_queue_exit(self._ring)
+            self._ring = self._cqe = self._inflight = None
+        super()._drop_socket()
+
+    def close(self):
+        with self._lock:
+            if self._ring is not None:
+                try:
+                    self._reap(wait=True)
+                    self._flush_buffer()
+                    if self._ring is not None:
+                        self._reap(wait=True)
+                except OSError as exc:
+                    logger.warning("UringTelemetryEmitter: final write failed (%s)", exc)
+            super().close()
@@ -1,22 +1,21 @@
 # telemetry_schema.py
-from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Annotated, Optional
+import msgspec
+from msgspec import Meta
 
-class TelemetryPacket(BaseModel):
+# scalar fields only, so instances can never form reference cycles: keep them out of the GC
+class TelemetryPacket(msgspec.Struct, forbid_unknown_fields=True, gc=False):
     driver_id: str
-    timestamp_ms: int = Field(..., ge=0)
-    lap: int = Field(..., ge=0)
-    lap_progress: float = Field(..., ge=0.0, le=1.0)
-    speed_mps: float = Field(..., ge=0.0)
+    timestamp_ms: Annotated[int, Meta(ge=0)]
+    lap: Annotated[int, Meta(ge=0)]
+    lap_progress: Annotated[float, Meta(ge=0.0, le=1.0)]
+    speed_mps: Annotated[float, Meta(ge=0.0)]
     position_x: float
     position_y: float
     yaw: float
     # sector 1..3 or None
-    sector: Optional[int] = Field(None, ge=1, le=3)
-    throttle_pct: Optional[float] = Field(0.0, ge=0.0, le=100.0)
-    brake_pct: Optional[float] = Field(0.0, ge=0.0, le=100.0)
-    tyre_temp: Optional[float] = Field(0.0, ge=0.0)
-    battery_pct: Optional[float] = Field(None, ge=0.0, le=100.0)
-
-    class Config:
-        extra = "forbid"
+    sector: Optional[Annotated[int, Meta(ge=1, le=3)]] = None
+    throttle_pct: Optional[Annotated[float, Meta(ge=0.0, le=100.0)]] = 0.0
+    brake_pct: Optional[Annotated[float, Meta(ge=0.0, le=100.0)]] = 0.0
+    tyre_temp: Optional[Annotated[float, Meta(ge=0.0)]] = 0.0
+    battery_pct: Optional[Annotated[float, Meta(ge=0.0, le=100.0)]] = None
@@ -2,7 +2,8 @@
 # test_client.py
 import socketio
 
-sio = socketio.Client(logger=True, engineio_logger=True)
+# no per-packet socket.io / engine.io logging: it costs more than handling the update
+sio = socketio.Client(logger=False, engineio_logger=False)
 
 @sio.event
 def connect():
@@ -20,7 +21,8 @@ def on_race_update(data):
         print("[Client] race_update received (unprintable)")
 
 if __name__ == "__main__":
-    sio.connect("http://127.0.0.1:8000")
+    # one websocket for everything; no long-polling HTTP round trips
+    sio.connect("http://127.0.0.1:8000", transports=["websocket"])
     print("Listening for race_update... (CTRL+C to quit)")
     sio.wait()
 
@@ -1,11 +1,15 @@
 # verbose_test_client.py
+import sys
 import socketio
 import asyncio
 import logging
 
-logging.basicConfig(level=logging.DEBUG)
+# --hot: throughput runs; drop the socket.io / engine.io packet logging
+HOT = "--hot" in sys.argv
 
-sio = socketio.AsyncClient(logger=True, engineio_logger=True)
+logging.basicConfig(level=logging.WARNING if HOT else logging.DEBUG)
+
+sio = socketio.AsyncClient(logger=not HOT, engineio_logger=not HOT)
 
 @sio.event
 async def connect():
@@ -31,8 +35,8 @@ async def disconnect():
 
 async def main():
     try:
-        # try local loopback and both transports
-        await sio.connect("http://127.0.0.1:8000", transports=['polling'])
+        # local loopback over a single websocket (no long-polling fallback)
+        await sio.connect("http://127.0.0.1:8000", transports=['websocket'])
 
         await sio.wait()
     except Exception as e:
@@ -1,49 +1,37 @@
 # view_replay.py
+import os
 import sys
-import json
+import orjson
+from multiprocessing import Pool
 from pathlib import Path
 import pandas as pd
+import matplotlib
+matplotlib.use("Agg")  # files only; no GUI state in the plotting workers
 import matplotlib.pyplot as plt
 
 def load_replay(path):
     path = Path(path)
     if not path.exists():
         raise FileNotFoundError(path)
-    with open(path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    return data
+    return orjson.loads(path.read_bytes())
+
+# flat column order (one row per car per tick)
+FLAT_COLUMNS = ["run_id", "tick", "time", "car_id", "pos_x", "pos_y", "speed",
+                "lap_time", "lap_number", "status", "position_diff"]
 
 def flatten_replay(data):
-    rows = []
-    for tick_entry in data:
-        tick = tick_entry.get("tick")
-        run_id = tick_entry.get("run_id")
-        ts = tick_entry.get("time")
-        cars = tick_entry.get("cars", [])
-        for c in cars:
-            pos = c.get("position", None)
-            px = py = None
-            if isinstance(pos, (list, tuple)) and len(pos) >= 1:
-                px = pos[0]
-                py = pos[1] if len(pos) > 1 else None
-            elif isinstance(pos, dict):
-                px = pos.get("x")
-                py = pos.get("y")
-            rows.append({
-                "run_id": run_id,
-                "tick": tick,
-                "time": ts,
-                "car_id": c.get("id"),
-                "pos_x": px,
-                "pos_y": py,
-                "speed": c.get("speed"),
-                "lap_time": c.get("lap_time"),
-                "lap_number": c.get("lap_number"),
-                "status": c.get("status"),
-                "position_diff": c.get("position_diff"),
-            })
-    df = pd.DataFrame(rows)
-    return df
+    # pandas walks the nested tick -> cars records itself; ticks without cars add no rows
+    ticks = [t for t in data if t.get("cars")]
+    df = pd.json_normalize(ticks, record_path="cars", meta=["tick", "run_id", "time"], errors="ignore")
+    # dict positions ({"x", "y"}) come out already split as position.x / position.y
+    df = df.rename(columns={"id": "car_id", "position.x": "pos_x", "position.y": "pos_y"})
+    if "position" in df.columns:
+        # [x, y] list positions: split the whole column at once
+        xy = pd.DataFrame([p if isinstance(p, (list, tuple)) else () for p in df["position"]], index=df.index)
+        for i, col in enumerate(("pos_x", "pos_y")):
+            if i in xy.columns:
+                df[col] = xy[i].combine_first(df[col]) if col in df.columns else xy[i]
+    return df.reindex(columns=FLAT_COLUMNS).infer_objects()
 
 def summarize(df):
     print("Replay summary")
@@ -65,24 +53,35 @@ def save_csv(df, out_path):
     df.to_csv(out_path, index=False)
     print("Saved CSV:", out_path)
 
+def _plot_one(job):
+    # one car's plot; runs in a Pool worker, so it gets plain arrays rather than the DataFrame
+    car, ticks, speeds, out_dir = job
+    plt.figure()
+    plt.plot(ticks, speeds)
+    plt.title(f"Speed vs Tick — {car}")
+    plt.xlabel("Tick")
+    plt.ylabel("Speed")
+    plt.grid(True)
+    out_file = out_dir / f"{car}_speed.png"
+    plt.savefig(out_file, bbox_inches='tight')
+    plt.close()
+    return out_file
+
 def plot_speeds(df, out_dir):
     out_dir = Path(out_dir)
     out_dir.mkdir(parents=True, exist_ok=True)
-    cars = sorted(df['car_id'].dropna().unique())
-    for car in cars:
-        d = df[df['car_id'] == car].sort_values('tick')
+    jobs = []
+    for car, d in df.groupby('car_id', sort=True):
         if d['speed'].dropna().empty:
             continue
-        plt.figure()
-        plt.plot(d['tick'], d['speed'])
-        plt.title(f"Speed vs Tick — {car}")
-        plt.xlabel("Tick")
-        plt.ylabel("Speed")
-        plt.grid(True)
-        out_file = out_dir / f"{car}_speed.png"
-        plt.savefig(out_file, bbox_inches='tight')
-        plt.close()
-        print("Wrote plot:", out_file)
+        d = d.sort_values('tick')
+        jobs.append((car, d['tick'].to_numpy(), d['speed'].to_numpy(), out_dir))
+    if not jobs:
+        return
+    # PNG rendering/encoding dominates; spread the cars over processes
+    with Pool(processes=min(len(jobs), os.cpu_count() or 1)) as pool:
+        for out_file in pool.map(_plot_one, jobs):
+            print("Wrote plot:", out_file)
 
 def main():
     if len(sys.argv) < 2: